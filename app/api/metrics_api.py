@@ -0,0 +1,31 @@
+"""
+Metrics endpoint for the Yale Trading Simulation Platform.
+Exposes cache, upstream, database and request metrics in the Prometheus
+text exposition format for scraping.
+"""
+import hmac
+from flask import Blueprint, Response, abort, current_app, request
+from app.utils.metrics import render_metrics
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Create blueprint for the metrics endpoint
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Get the metrics of every worker on this host.
+    
+    When METRICS_TOKEN is set, the request must carry it as a bearer token.
+    
+    Returns:
+        Prometheus text exposition document
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        abort(401)
+    
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
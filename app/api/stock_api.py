@@ -2,9 +2,14 @@
 API endpoints for stock data in the Yale Trading Simulation Platform.
 Provides routes for retrieving stock information, historical data, and search functionality.
 """
-from flask import Blueprint, jsonify, request
+import json
+import time
+from flask import Blueprint, Response, current_app, jsonify, request
 from flask_login import login_required
-from app.utils.stock_utils import get_stock_info, get_stock_historical_data, search_stocks, get_market_summary
+from app.utils.stock_utils import get_stock_info, get_stock_quotes, get_stock_historical_data, search_stocks, get_market_summary
+from app.utils.symbol_index import get_symbol_index
+from app.utils.price_stream import get_publisher, price_update
+from app import db
 import logging
 
 # Set up logging
@@ -13,6 +18,12 @@ logger = logging.getLogger(__name__)
 # Create blueprint for stock API endpoints
 stock_api_bp = Blueprint('stock_api', __name__)
 
+# Upper bound for the history points parameter
+MAX_HISTORY_POINTS = 5000
+
+# Upper bound for the number of tickers in one batch price request
+MAX_PRICE_TICKERS = 50
+
 @stock_api_bp.route('/stock/info/<ticker>', methods=['GET'])
 @login_required
 def api_stock_info(ticker):
@@ -40,6 +51,128 @@ def api_stock_info(ticker):
         }), 404
 
 
+def _parse_tickers():
+    """Read the comma-separated 'tickers' query parameter as unique upper-case symbols."""
+    return list(dict.fromkeys(t.strip().upper() for t in request.args.get('tickers', '').split(',') if t.strip()))
+
+
+@stock_api_bp.route('/stock/prices', methods=['GET'])
+@login_required
+def api_stock_prices():
+    """
+    Get current prices for several stocks in one request.
+    
+    Query Params:
+        tickers: Comma-separated ticker symbols (at most MAX_PRICE_TICKERS)
+        
+    Returns:
+        JSON response mapping each ticker to its price and day change;
+        tickers without a price are listed under 'missing'
+    """
+    tickers = _parse_tickers()
+    
+    if not tickers:
+        return jsonify({
+            'success': False,
+            'message': "Query parameter 'tickers' is required"
+        }), 400
+    if len(tickers) > MAX_PRICE_TICKERS:
+        return jsonify({
+            'success': False,
+            'message': f"At most {MAX_PRICE_TICKERS} tickers can be requested at once"
+        }), 400
+    
+    prices = {}
+    missing = []
+    for ticker, quote in get_stock_quotes(tickers).items():
+        update = price_update(quote)
+        if update:
+            prices[ticker] = update
+        else:
+            missing.append(ticker)
+    
+    # Keep polled tickers in the hub's refresh set so later polls hit a warm cache;
+    # only ones that returned a price, so made-up symbols cost nothing per cycle
+    get_publisher().watch(prices)
+    
+    return jsonify({
+        'success': True,
+        'prices': prices,
+        'missing': missing
+    })
+
+
+@stock_api_bp.route('/stream/prices', methods=['GET'])
+@login_required
+def api_stream_prices():
+    """
+    Stream price updates for several stocks as Server-Sent Events.
+    
+    The first 'prices' event carries the current price of every ticker; later
+    events carry only tickers whose price changed. The stream ends after
+    PRICE_STREAM_MAX_DURATION seconds and the browser reconnects on its own,
+    so no worker is held indefinitely. Only available when PRICE_STREAM_ENABLED
+    is set, since every open stream occupies a worker thread.
+    
+    Query Params:
+        tickers: Comma-separated ticker symbols (at most MAX_PRICE_TICKERS)
+        
+    Returns:
+        text/event-stream response, or a JSON error message
+    """
+    if not current_app.config.get('PRICE_STREAM_ENABLED'):
+        return jsonify({
+            'success': False,
+            'message': "Price streaming is disabled; poll /api/stock/prices instead"
+        }), 404
+    
+    tickers = _parse_tickers()
+    
+    if not tickers or len(tickers) > MAX_PRICE_TICKERS:
+        return jsonify({
+            'success': False,
+            'message': f"Query parameter 'tickers' must list 1 to {MAX_PRICE_TICKERS} tickers"
+        }), 400
+    
+    max_duration = current_app.config.get('PRICE_STREAM_MAX_DURATION', 300)
+    keepalive = current_app.config.get('PRICE_STREAM_KEEPALIVE', 15)
+    initial = {ticker: update for ticker, update in
+               ((ticker, price_update(quote)) for ticker, quote in get_stock_quotes(tickers).items()) if update}
+    if not initial:
+        return jsonify({
+            'success': False,
+            'message': "No prices are available for the requested tickers"
+        }), 404
+    
+    def events():
+        publisher = get_publisher()
+        # Only tickers that returned a price are refreshed by the hub
+        subscription = publisher.subscribe(initial)
+        ends_at = time.monotonic() + max_duration
+        try:
+            yield f"retry: 5000\nevent: prices\ndata: {json.dumps(initial)}\n\n"
+            while True:
+                left = ends_at - time.monotonic()
+                if left <= 0:
+                    break
+                updates = subscription.wait(min(keepalive, left))
+                if updates:
+                    yield f"event: prices\ndata: {json.dumps(updates)}\n\n"
+                else:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+        finally:
+            publisher.unsubscribe(subscription)
+    
+    # The stream never touches the database; hand the connection back before it starts
+    db.session.remove()
+    
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @stock_api_bp.route('/stock/history/<ticker>', methods=['GET'])
 @login_required
 def api_stock_history(ticker):
@@ -51,12 +184,18 @@ def api_stock_history(ticker):
     
     Query Params:
         period: Time period for historical data (default: '1mo')
+        format: 'records' for a list of per-day objects (default) or 'columns'
+            for one array per field ({"date": [...], "close": [...], ...})
+        points: Optional maximum number of bars; longer series are downsampled
+            on the server with Largest-Triangle-Three-Buckets
         
     Returns:
         JSON response with historical price data or error message
     """
     ticker = ticker.upper()
     period = request.args.get('period', '1mo')
+    data_format = request.args.get('format', 'records')
+    points = request.args.get('points', type=int)
     
     # Validate period parameter
     valid_periods = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
@@ -66,13 +205,26 @@ def api_stock_history(ticker):
             'message': f"Invalid period parameter. Must be one of: {', '.join(valid_periods)}"
         }), 400
     
-    historical_data = get_stock_historical_data(ticker, period)
+    if data_format not in ('records', 'columns'):
+        return jsonify({
+            'success': False,
+            'message': "Invalid format parameter. Must be one of: records, columns"
+        }), 400
+    
+    if points is not None and not 3 <= points <= MAX_HISTORY_POINTS:
+        return jsonify({
+            'success': False,
+            'message': f"Invalid points parameter. Must be between 3 and {MAX_HISTORY_POINTS}"
+        }), 400
+    
+    historical_data = get_stock_historical_data(ticker, period, columnar=(data_format == 'columns'), points=points)
     
     if historical_data:
         return jsonify({
             'success': True,
             'ticker': ticker,
             'period': period,
+            'format': data_format,
             'data': historical_data
         })
     else:
@@ -112,6 +264,32 @@ def api_stock_search():
     })
 
 
+@stock_api_bp.route('/stock/autocomplete', methods=['GET'])
+@login_required
+def api_stock_autocomplete():
+    """
+    Suggest tickers for a partial ticker or company name from the local symbol index.
+    
+    Query Params:
+        q: What the user has typed so far
+        limit: Maximum number of suggestions (default: 10, max: 25)
+        
+    Returns:
+        JSON response with matching tickers and company names
+    """
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 25)
+    
+    results = get_symbol_index().search(query, limit=limit) if query else []
+    
+    return jsonify({
+        'success': True,
+        'query': query,
+        'count': len(results),
+        'results': results
+    })
+
+
 @stock_api_bp.route('/market/summary', methods=['GET'])
 @login_required
 def api_market_summary():
@@ -2,8 +2,9 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import current_user, login_required
 from app import db
 from app.forms import StockSearchForm, TradeForm
-from app.utils.stock_utils import get_stock_info, get_stock_historical_data, search_stocks, get_trending_stocks
+from app.utils.stock_utils import get_stock_info, get_stock_quote, get_stock_historical_data, search_stocks, get_trending_stocks
 from app.utils.trading_utils import execute_buy, execute_sell, get_portfolio_summary
+from app.utils.price_stream import get_publisher, price_update
 from app.models.stock import StockHolding, Transaction
 import logging
 
@@ -78,6 +79,8 @@ def stock_detail(ticker):
             return redirect(url_for('trading.stock_search'))
         
         logger.info(f"Successfully retrieved stock info for {ticker}: {stock_info['name']}")
+        if price_update(stock_info):
+            get_publisher().watch([ticker])
         
         # Ensure all numeric fields have default values to prevent template errors
         numeric_fields = [
@@ -230,13 +233,13 @@ def portfolio():
 def get_current_stock_price(ticker):
     """API endpoint to get the current price of a stock"""
     ticker = ticker.upper()
-    stock_info = get_stock_info(ticker)
+    quote = get_stock_quote(ticker)
     
-    if stock_info:
+    if quote:
         return jsonify({
             'success': True,
             'ticker': ticker,
-            'price': stock_info['current_price']
+            'price': quote['current_price']
         })
     else:
         return jsonify({
@@ -162,4 +162,58 @@ class CashTransaction(db.Model):
 
     def __repr__(self):
         """String representation of CashTransaction object"""
-        return f"CashTransaction('{self.transaction_type}', ${self.amount:.2f})" 
\ No newline at end of file
+        return f"CashTransaction('{self.transaction_type}', ${self.amount:.2f})"
+
+
+class PriceBar(db.Model):
+    """
+    A stored daily OHLCV bar for a ticker.
+    Together these form the persistent price history store, so chart periods
+    are served locally and only the newest bars are fetched upstream.
+    """
+    __table_args__ = (db.UniqueConstraint('ticker', 'date', name='uq_price_bar_ticker_date'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    ticker = db.Column(db.String(10), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    open = db.Column(db.Float, nullable=False)
+    high = db.Column(db.Float, nullable=False)
+    low = db.Column(db.Float, nullable=False)
+    close = db.Column(db.Float, nullable=False)
+    volume = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        """String representation of PriceBar object"""
+        return f"PriceBar('{self.ticker}', {self.date}, close={self.close:.2f})"
+
+
+class PriceHistoryCoverage(db.Model):
+    """
+    Records how much of a ticker's history the price store holds.
+    covered_from is the earliest date from which stored bars are complete
+    (covers_max means the full listing history), and last_fetched is when the
+    newest bars were last pulled from upstream.
+    """
+    ticker = db.Column(db.String(10), primary_key=True)
+    covered_from = db.Column(db.Date, nullable=True)
+    covers_max = db.Column(db.Boolean, nullable=False, default=False)
+    last_fetched = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        """String representation of PriceHistoryCoverage object"""
+        return f"PriceHistoryCoverage('{self.ticker}', from={self.covered_from}, max={self.covers_max})"
+
+
+class PreviousClose(db.Model):
+    """
+    The previous session's closing price for a ticker.
+    Filled in bulk once per trading day and used for day-change figures;
+    as_of is the session date the close belongs to.
+    """
+    ticker = db.Column(db.String(10), primary_key=True)
+    as_of = db.Column(db.Date, nullable=False)
+    close = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        """String representation of PreviousClose object"""
+        return f"PreviousClose('{self.ticker}', {self.as_of}, close={self.close:.2f})"
@@ -50,47 +50,34 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Stock detail page - Update stock price periodically
-    const stockPriceElement = document.getElementById('current-price');
-    if (stockPriceElement) {
-        const ticker = stockPriceElement.dataset.ticker;
+    // Live prices - refresh every element marked with data-live-price in one batch request
+    const livePriceElements = document.querySelectorAll('[data-live-price]');
+    if (livePriceElements.length > 0) {
+        const tickers = [...new Set([...livePriceElements].map(el => el.dataset.livePrice))];
         
-        // Periodically update the stock price (every 30 seconds)
-        setInterval(function() {
-            fetchStockPrice(ticker);
-        }, 30000);
+        if (document.body.hasAttribute('data-price-stream') && window.EventSource) {
+            // Server pushes prices as they change; the browser reconnects automatically
+            const stream = new EventSource(`/api/stream/prices?tickers=${encodeURIComponent(tickers.join(','))}`);
+            stream.addEventListener('prices', function(event) {
+                Object.entries(JSON.parse(event.data)).forEach(([ticker, quote]) => updateLivePrice(ticker, quote));
+            });
+        } else {
+            // Periodically update the prices (every 30 seconds)
+            setInterval(function() {
+                fetchStockPrices(tickers);
+            }, 30000);
+        }
         
-        // Fetch stock price and update UI
-        function fetchStockPrice(ticker) {
-            fetch(`/api/stock/price/${ticker}`)
+        // Fetch prices for all tickers on the page and update UI
+        function fetchStockPrices(tickers) {
+            fetch(`/api/stock/prices?tickers=${encodeURIComponent(tickers.join(','))}`)
                 .then(response => response.json())
                 .then(data => {
                     if (data.success) {
-                        const oldPrice = parseFloat(stockPriceElement.dataset.price);
-                        const newPrice = data.price;
-                        
-                        stockPriceElement.dataset.price = newPrice;
-                        stockPriceElement.textContent = `$${newPrice.toFixed(2)}`;
-                        
-                        // Show price change indication
-                        if (newPrice > oldPrice) {
-                            stockPriceElement.classList.remove('price-down');
-                            stockPriceElement.classList.add('price-up');
-                            setTimeout(() => stockPriceElement.classList.remove('price-up'), 1000);
-                        } else if (newPrice < oldPrice) {
-                            stockPriceElement.classList.remove('price-up');
-                            stockPriceElement.classList.add('price-down');
-                            setTimeout(() => stockPriceElement.classList.remove('price-down'), 1000);
-                        }
-                        
-                        // Update hidden price input in trade form
-                        const priceInput = document.getElementById('price');
-                        if (priceInput) {
-                            priceInput.value = newPrice;
-                        }
+                        Object.entries(data.prices).forEach(([ticker, quote]) => updateLivePrice(ticker, quote));
                     }
                 })
-                .catch(error => console.error('Error fetching stock price:', error));
+                .catch(error => console.error('Error fetching stock prices:', error));
         }
     }
 
@@ -219,4 +206,43 @@ function initializeStockCharts() {
     } catch (error) {
         console.error('Error initializing stock chart:', error);
     }
-} 
\ No newline at end of file
+} 
+
+// Update every element showing a live price or day change for a ticker
+// Elements with data-quantity show the position value (quantity x price) instead
+function updateLivePrice(ticker, quote) {
+    const newPrice = quote.price;
+    document.querySelectorAll(`[data-live-price="${ticker}"]`).forEach(element => {
+        const oldPrice = parseFloat(element.dataset.price);
+        const quantity = parseFloat(element.dataset.quantity || 1);
+        
+        element.dataset.price = newPrice;
+        element.textContent = `$${(newPrice * quantity).toFixed(2)}`;
+        
+        // Show price change indication
+        if (newPrice > oldPrice) {
+            element.classList.remove('price-down');
+            element.classList.add('price-up');
+            setTimeout(() => element.classList.remove('price-up'), 1000);
+        } else if (newPrice < oldPrice) {
+            element.classList.remove('price-up');
+            element.classList.add('price-down');
+            setTimeout(() => element.classList.remove('price-down'), 1000);
+        }
+    });
+    
+    // Day change shown next to a price, e.g. in the trending stocks list
+    document.querySelectorAll(`[data-live-change="${ticker}"]`).forEach(element => {
+        const changePercent = quote.change_percent || 0;
+        element.textContent = `${changePercent >= 0 ? '+' : ''}${changePercent.toFixed(1)}%`;
+        element.classList.toggle('text-success', changePercent >= 0);
+        element.classList.toggle('text-danger', changePercent < 0);
+    });
+    
+    // Update hidden price input in trade form
+    const priceInput = document.getElementById('price');
+    const tradeTicker = document.getElementById('current-price')?.dataset?.livePrice;
+    if (priceInput && tradeTicker === ticker) {
+        priceInput.value = newPrice;
+    }
+}
@@ -0,0 +1,329 @@
+"""
+In-memory caching utilities for the Yale Trading Simulation Platform.
+Provides a thread-safe, size-bounded cache with per-entry TTLs and LRU eviction,
+and single-flight coalescing of concurrent loads for the same key.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from app.utils import deadline
+from app.utils.deadline import DeadlineExceeded
+
+
+def estimate_size(value, _seen=None):
+    """
+    Roughly estimate the memory footprint of a cached value in bytes.
+
+    Walks dicts, lists, tuples and sets so nested stock info dictionaries
+    (including long description strings) are accounted for.
+
+    Args:
+        value: Any Python object
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in value)
+    return size
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry and a memory budget.
+
+    Expired entries are not dropped immediately: they stay available through
+    get_stale() as a fallback until they exceed the stale retention window or
+    are evicted to make room. Eviction is least-recently-used first, and runs
+    whenever the entry count or the estimated byte total goes over budget.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=8 * 1024 * 1024, default_ttl=300, stale_ttl=24 * 60 * 60):
+        """
+        Create a new cache.
+
+        Args:
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum estimated size of all entries in bytes
+            default_ttl: Freshness lifetime in seconds when set() is not given a ttl
+            stale_ttl: How long past expiry an entry is kept for stale fallbacks
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+
+        self._entries = OrderedDict()  # key -> (value, stored_at, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    def _drop(self, key):
+        """Remove an entry and release its byte accounting. Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[3]
+        return entry
+
+    def _evict(self):
+        """Evict least-recently-used entries until within budget. Caller holds the lock."""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest_key = next(iter(self._entries))
+            self._drop(oldest_key)
+            self.evictions += 1
+
+    def _lookup(self, key, now):
+        """Return a live (not past stale retention) entry or None. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[2] > self.stale_ttl:
+            self._drop(key)
+            return None
+        return entry
+
+    def get(self, key):
+        """
+        Get a fresh (unexpired) value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._lookup(key, now)
+            if entry is None or now >= entry[2]:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_stale(self, key):
+        """
+        Get a value regardless of expiry, for use as a fallback.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value (fresh or expired), or None if not cached
+        """
+        with self._lock:
+            entry = self._lookup(key, time.time())
+            if entry is None:
+                return None
+            self.stale_hits += 1
+            return entry[0]
+
+    def peek(self, key):
+        """
+        Inspect an entry without touching LRU order or counters.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            tuple: (value, stored_at, expires_at) or None if not cached
+        """
+        with self._lock:
+            entry = self._lookup(key, time.time())
+            if entry is None:
+                return None
+            return entry[0], entry[1], entry[2]
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Freshness lifetime in seconds (defaults to default_ttl)
+        """
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        size = estimate_size(value)
+        with self._lock:
+            self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, now, now + ttl, size)
+            self._bytes += size
+            self._evict()
+
+    def snapshot(self):
+        """
+        Copy out every live entry with its timestamps.
+
+        Returns:
+            list: (key, value, stored_at, expires_at) tuples, least recently used first
+        """
+        now = time.time()
+        with self._lock:
+            return [(key, entry[0], entry[1], entry[2]) for key, entry in self._entries.items()
+                    if now - entry[2] <= self.stale_ttl]
+
+    def restore(self, entries):
+        """
+        Load entries saved by snapshot(), keeping their original timestamps.
+
+        Entries past stale retention and keys already cached are skipped, so
+        restoring never overwrites newer data.
+
+        Args:
+            entries: Iterable of (key, value, stored_at, expires_at) tuples
+
+        Returns:
+            int: Number of entries restored
+        """
+        now = time.time()
+        restored = 0
+        with self._lock:
+            for key, value, stored_at, expires_at in entries:
+                if key in self._entries or now - expires_at > self.stale_ttl:
+                    continue
+                size = estimate_size(value)
+                if size > self.max_bytes:
+                    continue
+                self._entries[key] = (value, stored_at, expires_at, size)
+                self._bytes += size
+                restored += 1
+            self._evict()
+        return restored
+
+    def delete(self, key):
+        """Remove a key from the cache if present."""
+        with self._lock:
+            self._drop(key)
+
+    def clear(self):
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def resize(self, max_entries=None, max_bytes=None):
+        """
+        Change the cache budget, evicting entries if it shrank.
+
+        Args:
+            max_entries: New maximum entry count (unchanged if None)
+            max_bytes: New maximum byte budget (unchanged if None)
+        """
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def stats(self):
+        """
+        Get cache counters and current usage.
+
+        Returns:
+            dict: hits, misses, stale_hits, evictions, entries, bytes and budget limits
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale_hits': self.stale_hits,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._lookup(key, time.time()) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class _Call:
+    """An in-progress single-flight call and its eventual outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is running block until it finishes and receive the same result (or
+    exception). A waiting caller gives up with DeadlineExceeded when its
+    request budget runs out; the first caller carries on and still fills the
+    cache. Once the call completes the key is released, so the next caller
+    starts a new execution.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) unless a call for key is already in flight.
+
+        Args:
+            key: Identifies equivalent calls
+            fn: Function to run
+
+        Returns:
+            The function's result, shared by every caller waiting on key
+
+        Raises:
+            DeadlineExceeded: If the request budget ran out while waiting on another caller's run
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if not call.done.wait(deadline.remaining()):
+                raise DeadlineExceeded(f"Gave up waiting for the in-flight call {key}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
@@ -0,0 +1,38 @@
+"""
+Concurrency-safe bulk upserts for the Yale Trading Simulation Platform.
+Lets several gunicorn workers store the same market data rows at once without
+failing on primary key or unique constraints.
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+_DIALECTS = {'postgresql': postgresql, 'sqlite': sqlite}
+
+
+def upsert(session, model, rows, key_columns):
+    """
+    Insert rows, overwriting the other columns of rows whose key already exists.
+
+    Uses INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and SQLite, so a
+    concurrent writer of the same rows never fails on the unique constraint;
+    other databases fall back to merging row by row.
+
+    Args:
+        session (Session): Session to write through
+        model: Mapped class of the target table
+        rows (list): Column -> value dicts
+        key_columns (tuple): Columns of the primary key or unique constraint
+    """
+    if not rows:
+        return
+    dialect = _DIALECTS.get(session.get_bind().dialect.name)
+    if dialect is None:
+        for row in rows:
+            session.merge(model(**row))
+        return
+    statement = dialect.insert(model.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={column: statement.excluded[column] for column in rows[0] if column not in key_columns}
+    )
+    session.execute(statement, rows)
@@ -0,0 +1,90 @@
+"""
+Per-request time budgets for market data calls in the Yale Trading Simulation Platform.
+Each web request gets a deadline; upstream calls made while handling it
+(including those fanned out to worker threads) only wait for whatever time is
+left, so a slow data source degrades pages to cached values instead of
+holding the worker.
+"""
+import logging
+import threading
+import time
+from functools import wraps
+
+from app.utils.upstream_guard import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """Raised when a market data call cannot finish within the remaining time budget."""
+
+
+def get_deadline():
+    """Return the current thread's deadline (time.monotonic() value) or None."""
+    return getattr(_local, 'deadline', None)
+
+
+def set_deadline(deadline):
+    """Set (or clear, with None) the current thread's deadline."""
+    _local.deadline = deadline
+
+
+def remaining(default=None):
+    """
+    Get the seconds left in the current budget.
+
+    Args:
+        default: Value returned when no deadline is set
+
+    Returns:
+        float: Seconds left (never negative), or default without a deadline
+    """
+    deadline = get_deadline()
+    if deadline is None:
+        return default
+    return max(0.0, deadline - time.monotonic())
+
+
+def propagate(fn):
+    """
+    Wrap a function so it runs under the caller's deadline on another thread.
+
+    Args:
+        fn: Function to be submitted to a thread pool
+
+    Returns:
+        callable: Wrapper that installs the submitting thread's deadline while fn runs
+    """
+    deadline = get_deadline()
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        previous = get_deadline()
+        set_deadline(deadline)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            set_deadline(previous)
+    return wrapper
+
+
+def init_request_deadlines(app):
+    """
+    Give every request a MARKET_REQUEST_BUDGET second budget for market data calls.
+
+    Args:
+        app: Flask application instance
+    """
+    seconds = app.config.get('MARKET_REQUEST_BUDGET')
+    if not seconds:
+        return
+
+    @app.before_request
+    def start_request_budget():
+        set_deadline(time.monotonic() + seconds)
+
+    @app.teardown_request
+    def clear_request_budget(exc=None):
+        set_deadline(None)
@@ -0,0 +1,52 @@
+"""
+Chart downsampling utilities for the Yale Trading Simulation Platform.
+Reduces long price series to a fixed number of points while keeping the
+visual shape (peaks, troughs and trend changes) of the original line.
+"""
+import numpy as np
+
+
+def lttb_indices(values, threshold):
+    """
+    Pick the points to keep using Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The rest of the series is
+    split into threshold - 2 equal buckets, and from each bucket the point
+    forming the largest triangle with the previously kept point and the
+    average of the next bucket is selected. Points are treated as evenly
+    spaced on the x axis (one per trading day).
+
+    Args:
+        values: Sequence of y values (e.g. closing prices)
+        threshold (int): Number of points to keep
+
+    Returns:
+        numpy.ndarray: Sorted integer positions of the points to keep
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries for the interior points 1 .. n-2
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    x = np.arange(n, dtype=float)
+
+    # Average point of every bucket, used as the third triangle vertex
+    bucket_sums = np.add.reduceat(y[:n - 1], edges[:-1])
+    bucket_lengths = np.diff(edges)
+    avg_y = np.append(bucket_sums / bucket_lengths, y[-1])
+    avg_x = np.append((edges[:-1] + edges[1:] - 1) / 2.0, n - 1)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        bx, by = x[start:end], y[start:end]
+        # Twice the triangle area; the constant factor does not change the argmax
+        areas = np.abs((x[prev] - avg_x[i + 1]) * (by - y[prev]) - (x[prev] - bx) * (avg_y[i + 1] - y[prev]))
+        prev = start + int(np.argmax(areas))
+        selected[i + 1] = prev
+    return selected
@@ -0,0 +1,235 @@
+"""
+Persistent daily price history store for the Yale Trading Simulation Platform.
+Keeps OHLCV bars per ticker in the database and only asks the market data
+provider for history the store does not already cover.
+
+Provider bars are split- and dividend-adjusted, so appending newer bars is
+only valid while no corporate action happens; a tail that contains a split or
+dividend discards the ticker's stored bars and downloads them again.
+
+Writes go through a session of their own and upsert on the (ticker, date) key,
+so workers storing the same ticker at once do not collide and a request's own
+session is never committed halfway through.
+"""
+import logging
+from datetime import datetime, timedelta
+
+import pandas as pd
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.stock import PriceBar, PriceHistoryCoverage
+from app.utils.db_upsert import upsert
+from app.utils.market_data import MARKET_TZ, get_provider, _slice_period
+from app.utils.upstream_guard import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Provider columns that flag a corporate action changing the adjustment of earlier bars
+ACTION_COLUMNS = ('Stock Splits', 'Dividends')
+
+PERIOD_OFFSETS = {
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+
+def period_start(period, today):
+    """
+    Get the earliest calendar date a period needs bars from.
+
+    Args:
+        period (str): yfinance period string
+        today (date): The current market date
+
+    Returns:
+        date: First date required, or None for 'max'
+    """
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return today.replace(month=1, day=1)
+    if period.endswith('d') and period[:-1].isdigit():
+        # Trading-day periods: allow for weekends and holidays
+        days = int(period[:-1])
+        return today - timedelta(days=days * 7 // 5 + 7)
+    if period in PERIOD_OFFSETS:
+        return (pd.Timestamp(today) - PERIOD_OFFSETS[period]).date()
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def _is_covered(coverage, period, required_start):
+    """Check whether stored bars already span the requested period."""
+    if coverage is None:
+        return False
+    if coverage.covers_max:
+        return True
+    if period == 'max' or coverage.covered_from is None:
+        return False
+    return coverage.covered_from <= required_start
+
+
+def _save_coverage(session, ticker, **fields):
+    """Create or update a ticker's coverage row with the given fields."""
+    upsert(session, PriceHistoryCoverage, [dict(ticker=ticker, **fields)], ('ticker',))
+
+
+def _save_bars(session, ticker, frame):
+    """
+    Upsert bars for a ticker, replacing stored bars on the same dates.
+
+    Args:
+        session (Session): Session to write through
+        ticker (str): Normalized ticker symbol
+        frame (pandas.DataFrame): Provider bars indexed by date
+    """
+    frame = frame.dropna(subset=['Close'])
+    if frame.empty:
+        return
+    dates = [ts.date() for ts in frame.index]
+    volumes = frame['Volume'].fillna(0).astype('int64').tolist()
+    upsert(session, PriceBar, [
+        {
+            'ticker': ticker,
+            'date': bar_date,
+            'open': bar_open,
+            'high': bar_high,
+            'low': bar_low,
+            'close': bar_close,
+            'volume': bar_volume,
+        }
+        for bar_date, bar_open, bar_high, bar_low, bar_close, bar_volume in zip(
+            dates, frame['Open'].tolist(), frame['High'].tolist(), frame['Low'].tolist(),
+            frame['Close'].tolist(), volumes)
+    ], ('ticker', 'date'))
+
+
+def _has_corporate_action(frame, after):
+    """
+    Check whether fetched bars include a split or dividend after a date.
+
+    Args:
+        frame (pandas.DataFrame): Provider bars indexed by date
+        after (date): Only actions on later dates count
+
+    Returns:
+        bool: True if earlier stored bars are no longer adjusted consistently
+    """
+    later = [ts.date() > after for ts in frame.index]
+    for column in ACTION_COLUMNS:
+        if column in frame.columns and (frame[column].fillna(0)[later] != 0).any():
+            return True
+    return False
+
+
+def _backfill(ticker, period, required_start, now, reset=False, stale=None):
+    """
+    Download a whole period and record it as covered.
+
+    Args:
+        ticker (str): Normalized ticker symbol
+        period (str): yfinance period string
+        required_start (date): First date the period needs
+        now (datetime): Current market time (naive)
+        reset (bool): Drop the ticker's stored bars first (their adjustment is out of date)
+        stale (PriceHistoryCoverage): Coverage row loaded in the request's session, expired once written
+
+    Returns:
+        pandas.DataFrame: Bars covering the period (empty if unavailable)
+    """
+    logger.info(f"Backfilling {period} history for {ticker} into the price store")
+    frame = get_provider().get_history(ticker, period=period)
+    with Session(db.engine) as session:
+        if reset:
+            session.query(PriceBar).filter(PriceBar.ticker == ticker).delete(synchronize_session=False)
+            _save_coverage(session, ticker, covers_max=False, covered_from=None, last_fetched=now)
+        if not frame.empty:
+            _save_bars(session, ticker, frame)
+            if period == 'max':
+                _save_coverage(session, ticker, covers_max=True, covered_from=frame.index[0].date(), last_fetched=now)
+            else:
+                _save_coverage(session, ticker, covers_max=False, covered_from=required_start, last_fetched=now)
+        session.commit()
+    if stale is not None:
+        db.session.expire(stale)
+    if frame.empty:
+        return frame
+    return _slice_period(frame, period)
+
+
+def _load_bars(ticker, start):
+    """
+    Read stored bars for a ticker into a provider-style DataFrame.
+
+    Args:
+        ticker (str): Normalized ticker symbol
+        start (date): First date to load, or None for everything
+
+    Returns:
+        pandas.DataFrame: Bars indexed by date with Open/High/Low/Close/Volume columns
+    """
+    query = db.session.query(
+        PriceBar.date, PriceBar.open, PriceBar.high, PriceBar.low, PriceBar.close, PriceBar.volume
+    ).filter(PriceBar.ticker == ticker)
+    if start is not None:
+        query = query.filter(PriceBar.date >= start)
+    rows = query.order_by(PriceBar.date).all()
+
+    frame = pd.DataFrame(rows, columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop('Date')), name='Date')
+    return frame
+
+
+def load_history(ticker, period):
+    """
+    Get daily bars for a period, fetching only what the store is missing.
+
+    A period older than the stored coverage triggers a one-off download of
+    that period; otherwise only bars since the last stored one are fetched,
+    at most once per HISTORY_TAIL_TTL seconds. If the tail shows a split or
+    dividend, the ticker's stored bars are replaced by a fresh backfill.
+    Must run inside an app context.
+
+    Args:
+        ticker (str): Normalized ticker symbol
+        period (str): yfinance period string
+
+    Returns:
+        pandas.DataFrame: Bars covering the period (empty if unavailable)
+    """
+    provider = get_provider()
+    now = datetime.now(MARKET_TZ).replace(tzinfo=None)
+    required_start = period_start(period, now.date())
+    tail_ttl = timedelta(seconds=current_app.config.get('HISTORY_TAIL_TTL', 300))
+
+    coverage = db.session.get(PriceHistoryCoverage, ticker)
+    if not _is_covered(coverage, period, required_start):
+        return _backfill(ticker, period, required_start, now, stale=coverage)
+
+    if now - coverage.last_fetched > tail_ttl:
+        last_date = db.session.query(func.max(PriceBar.date)).filter(PriceBar.ticker == ticker).scalar()
+        try:
+            frame = provider.get_history(ticker, start=last_date) if last_date else provider.get_history(ticker, period=period)
+        except UpstreamUnavailable as e:
+            # Serve the stored bars; the tail is fetched once the upstream is back
+            logger.warning(f"Skipping history tail fetch for {ticker}: {str(e)}")
+            return _slice_period(_load_bars(ticker, required_start), period)
+        if last_date and not frame.empty and _has_corporate_action(frame, last_date):
+            # Stored bars carry the old split/dividend adjustment; re-download them
+            logger.info(f"Corporate action in {ticker} history, refreshing stored bars")
+            return _backfill(ticker, period, required_start, now, reset=True, stale=coverage)
+        with Session(db.engine) as session:
+            _save_bars(session, ticker, frame)
+            session.query(PriceHistoryCoverage).filter(PriceHistoryCoverage.ticker == ticker).update(
+                {'last_fetched': now}, synchronize_session=False)
+            session.commit()
+        db.session.expire(coverage)
+
+    return _slice_period(_load_bars(ticker, required_start), period)
@@ -0,0 +1,44 @@
+"""
+Host-local SQLite files for the Yale Trading Simulation Platform.
+Shared by the stores that every gunicorn worker on a machine reads and writes
+(the market data cache and the metrics store): one connection per thread,
+autocommit, WAL journaling so readers proceed while another worker writes.
+"""
+import os
+import sqlite3
+import threading
+
+
+class LocalSQLite:
+    """
+    Base class for stores kept in a SQLite file shared between processes.
+
+    Subclasses pass their CREATE TABLE statement and call _connection() for
+    each operation; each thread gets its own connection, opened on first use.
+    """
+
+    def __init__(self, path, schema):
+        """
+        Open (creating if needed) the SQLite file and its table.
+
+        Args:
+            path: Filesystem path of the SQLite database
+            schema: CREATE TABLE IF NOT EXISTS statement for the store's table
+        """
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute(schema)
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
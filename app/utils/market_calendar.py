@@ -0,0 +1,203 @@
+"""
+NYSE trading calendar for the Yale Trading Simulation Platform.
+Knows the regular session hours, exchange holidays and early closes so
+caches and the background refresher can tell when prices can actually move.
+"""
+from datetime import date, datetime, time as dtime, timedelta
+from functools import lru_cache
+
+from app.utils.market_data import MARKET_TZ
+
+SESSION_OPEN = dtime(9, 30)
+SESSION_CLOSE = dtime(16, 0)
+EARLY_CLOSE = dtime(13, 0)
+
+# Time after the closing bell during which closing prints can still be revised
+CLOSE_SETTLE = timedelta(minutes=15)
+
+# Juneteenth became an exchange holiday in 2022
+JUNETEENTH_FIRST_YEAR = 2022
+
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """The n-th given weekday (0=Monday) of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Move a fixed-date holiday falling on a weekend to the nearest weekday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=32)
+def holidays(year):
+    """
+    Get the full-day NYSE holidays for a year.
+
+    Args:
+        year (int): Calendar year
+
+    Returns:
+        dict: Holiday date -> holiday name
+    """
+    days = {
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _nth_weekday(year, 5, 0, -1): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    # A Saturday New Year's Day is not observed on the preceding Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days[_observed(new_year)] = "New Year's Day"
+    if year >= JUNETEENTH_FIRST_YEAR:
+        days[_observed(date(year, 6, 19))] = "Juneteenth"
+    return days
+
+
+@lru_cache(maxsize=32)
+def early_closes(year):
+    """
+    Get the 1:00 pm early-close days for a year.
+
+    Args:
+        year (int): Calendar year
+
+    Returns:
+        set: Dates on which the session ends at 13:00 Eastern
+    """
+    days = {_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}  # Day after Thanksgiving
+    for day in (date(year, 7, 3), date(year, 12, 24)):
+        # Only when the eve is Monday-Thursday, i.e. the holiday itself is a weekday
+        if day.weekday() < 4:
+            days.add(day)
+    return days
+
+
+def is_trading_day(day):
+    """
+    Check whether the exchange holds a session on a date.
+
+    Args:
+        day (date): Calendar date
+
+    Returns:
+        bool: True on weekdays that are not exchange holidays
+    """
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def session(day):
+    """
+    Get the regular session for a date.
+
+    Args:
+        day (date): Calendar date
+
+    Returns:
+        tuple: (open, close) as Eastern-time datetimes, or None if closed all day
+    """
+    if not is_trading_day(day):
+        return None
+    close = EARLY_CLOSE if day in early_closes(day.year) else SESSION_CLOSE
+    return (datetime.combine(day, SESSION_OPEN, tzinfo=MARKET_TZ),
+            datetime.combine(day, close, tzinfo=MARKET_TZ))
+
+
+def is_open(now=None, after_close=timedelta(0)):
+    """
+    Check whether the regular session is in progress.
+
+    Args:
+        now (datetime): Time to check (defaults to the current time)
+        after_close (timedelta): Extra time after the close still counted as open
+
+    Returns:
+        bool: True during the session (plus the after_close allowance)
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    hours = session(now.date())
+    return hours is not None and hours[0] <= now < hours[1] + after_close
+
+
+def next_open(now=None):
+    """
+    Get the start of the next session that has not opened yet.
+
+    Args:
+        now (datetime): Reference time (defaults to the current time)
+
+    Returns:
+        datetime: Eastern-time opening bell strictly after now
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    day = now.date()
+    while True:
+        hours = session(day)
+        if hours is not None and hours[0] > now:
+            return hours[0]
+        day += timedelta(days=1)
+
+
+def previous_trading_day(day):
+    """
+    Get the last trading day strictly before a date.
+
+    Args:
+        day (date): Calendar date
+
+    Returns:
+        date: The previous session date
+    """
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def quote_ttl(base_ttl, now=None):
+    """
+    Stretch a quote lifetime across closed-market periods.
+
+    During the session (and while closing prices settle) quotes keep their
+    normal lifetime; outside it prices cannot change, so they stay fresh
+    until the next opening bell.
+
+    Args:
+        base_ttl (float): Lifetime in seconds while the market is open
+        now (datetime): Reference time (defaults to the current time)
+
+    Returns:
+        float: Lifetime in seconds
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if is_open(now, after_close=CLOSE_SETTLE):
+        return base_ttl
+    return max(base_ttl, (next_open(now) - now).total_seconds())
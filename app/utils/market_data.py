@@ -0,0 +1,561 @@
+"""
+Market data providers for the Yale Trading Simulation Platform.
+Wraps the upstream quote/history source behind a small interface so the app
+can run against Yahoo Finance in production or a deterministic local fixture
+backend for offline development and repeatable benchmarks.
+"""
+import json
+import logging
+import re
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from datetime import datetime, date, timedelta
+import zoneinfo
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from app.utils import deadline, metrics, request_timing
+from app.utils.deadline import DeadlineExceeded
+from app.utils.upstream_guard import CircuitBreaker, TokenBucket, UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = zoneinfo.ZoneInfo("America/New_York")
+
+_upstream_duration = metrics.histogram('market_upstream_duration_seconds', 'Upstream market data call latency',
+                                       ('provider', 'call', 'outcome'))
+_upstream_rejections = metrics.counter('market_upstream_rejections_total',
+                                       'Market data calls refused before reaching the upstream', ('reason',))
+
+
+class MarketDataProvider(ABC):
+    """
+    Interface for a source of stock quotes and price history.
+
+    Implementations return data in the same shape yfinance does so the
+    parsing logic in stock_utils stays backend-agnostic. get_info() and
+    get_history() are abstract, so an incomplete provider fails when it is
+    created rather than on its first request.
+    """
+    name = 'base'
+    remote = True  # Calls go over the network (and are worth rate limiting)
+
+    @abstractmethod
+    def get_info(self, ticker):
+        """
+        Get the raw info dictionary for a ticker.
+
+        Args:
+            ticker (str): Normalized (upper-case) ticker symbol
+
+        Returns:
+            dict: yfinance-style info dictionary (may be empty)
+        """
+        raise NotImplementedError
+
+    def get_quote(self, ticker):
+        """
+        Get a lightweight quote for a ticker.
+
+        Providers with a cheaper quote endpoint than the full info blob should
+        override this; the default derives the quote from get_info().
+
+        Args:
+            ticker (str): Normalized (upper-case) ticker symbol
+
+        Returns:
+            dict: price, previous_close and volume (values may be missing)
+        """
+        info = self.get_info(ticker) or {}
+        return {
+            'price': info.get('currentPrice', info.get('regularMarketPrice')),
+            'previous_close': info.get('previousClose', info.get('regularMarketPreviousClose')),
+            'volume': info.get('volume', info.get('regularMarketVolume')),
+        }
+
+    @abstractmethod
+    def get_history(self, ticker, period='1mo', start=None):
+        """
+        Get daily OHLCV bars for a ticker.
+
+        Args:
+            ticker (str): Normalized (upper-case) ticker symbol
+            period (str): yfinance period string (1d, 5d, 1mo, ..., ytd, max)
+            start (date): If given, fetch bars from this date to today instead of a period
+
+        Returns:
+            pandas.DataFrame: Bars indexed by date with Open/High/Low/Close/Volume columns
+        """
+        raise NotImplementedError
+
+    def get_closes(self, tickers, day):
+        """
+        Get the closing price of several tickers for one session.
+
+        Providers with a bulk download should override this; the default
+        reads each ticker's recent history.
+
+        Args:
+            tickers (list): Normalized (upper-case) ticker symbols
+            day (date): Session date
+
+        Returns:
+            dict: ticker -> close on the last session on or before day (missing if unavailable)
+        """
+        closes = {}
+        for ticker in tickers:
+            frame = self.get_history(ticker, start=day - timedelta(days=7))
+            frame = frame[frame.index.date <= day] if not frame.empty else frame
+            if not frame.empty:
+                closes[ticker] = float(frame['Close'].iloc[-1])
+        return closes
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Market data provider backed by the Yahoo Finance API."""
+    name = 'yfinance'
+
+    def get_info(self, ticker):
+        return yf.Ticker(ticker).info
+
+    def get_quote(self, ticker):
+        # fast_info reads the price chart endpoint instead of the heavy quoteSummary call
+        fast_info = yf.Ticker(ticker).fast_info
+        return {
+            'price': fast_info.last_price,
+            'previous_close': fast_info.previous_close,
+            'volume': fast_info.last_volume,
+        }
+
+    def get_history(self, ticker, period='1mo', start=None):
+        if start is not None:
+            return yf.Ticker(ticker).history(start=start)
+        return yf.Ticker(ticker).history(period=period)
+
+    def get_closes(self, tickers, day):
+        # One download request for every ticker; unadjusted closes match quoted previous closes
+        data = yf.download(list(tickers), start=day - timedelta(days=7), end=day + timedelta(days=1),
+                           auto_adjust=False, progress=False, threads=True)
+        if data.empty:
+            return {}
+        closes = data['Close']
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(tickers[0])
+        closes = closes[closes.index.date <= day].ffill()
+        if closes.empty:
+            return {}
+        last = closes.iloc[-1]
+        return {ticker: float(close) for ticker, close in last.items() if pd.notna(close)}
+
+
+class FixtureProvider(MarketDataProvider):
+    """
+    Deterministic offline market data provider.
+
+    Prices are a seeded random walk per ticker, so the same ticker always
+    produces the same series for a given day without any network access.
+    Info fields can be overridden per ticker from a JSON fixture file of the
+    form {"AAPL": {"longName": "Apple Inc.", ...}, ...}.
+    """
+    name = 'fixture'
+    remote = False
+
+    # Synthetic series start here; "max" history covers this whole range
+    EPOCH = date(1995, 1, 3)
+    SECTORS = ['Technology', 'Healthcare', 'Financial Services', 'Consumer Cyclical',
+               'Industrials', 'Energy', 'Communication Services', 'Consumer Defensive']
+    TICKER_PATTERN = re.compile(r'^[A-Z]{1,5}([.-][A-Z]{1,2})?$')
+
+    def __init__(self, fixture_path=None):
+        self._overrides = {}
+        self._series = {}
+        self._dates = (None, None)
+        self._lock = threading.Lock()
+
+        if fixture_path:
+            try:
+                with open(fixture_path) as f:
+                    self._overrides = {k.upper(): v for k, v in json.load(f).items()}
+                logger.info(f"Loaded market data fixtures for {len(self._overrides)} tickers from {fixture_path}")
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load market data fixture file {fixture_path}: {str(e)}")
+
+    def _is_known(self, ticker):
+        return ticker in self._overrides or bool(self.TICKER_PATTERN.match(ticker))
+
+    def _trading_days(self, today):
+        """Return the synthetic trading-day index up to today, shared by all tickers."""
+        with self._lock:
+            if self._dates[0] != today:
+                self._dates = (today, pd.bdate_range(self.EPOCH, today, tz=MARKET_TZ))
+            return self._dates[1]
+
+    def _full_series(self, ticker):
+        """Build (and memoize for the day) the full synthetic bar series for a ticker."""
+        today = datetime.now(MARKET_TZ).date()
+        with self._lock:
+            cached = self._series.get(ticker)
+            if cached is not None and cached[0] == today:
+                return cached[1]
+
+        seed = zlib.crc32(ticker.encode('utf-8'))
+        rng = np.random.RandomState(seed)
+        dates = self._trading_days(today)
+
+        start_price = 5 + seed % 200
+        returns = rng.normal(0.0002, 0.016, len(dates))
+        close = start_price * np.exp(np.cumsum(returns))
+        open_ = close * (1 + rng.normal(0, 0.004, len(dates)))
+        spread = np.abs(rng.normal(0, 0.01, len(dates)))
+        high = np.maximum(open_, close) * (1 + spread)
+        low = np.minimum(open_, close) * (1 - spread)
+        volume = rng.randint(1_000_000, 50_000_000, len(dates))
+
+        frame = pd.DataFrame({
+            'Open': open_.round(2),
+            'High': high.round(2),
+            'Low': low.round(2),
+            'Close': close.round(2),
+            'Volume': volume,
+        }, index=dates)
+        frame.index.name = 'Date'
+
+        with self._lock:
+            self._series[ticker] = (today, frame)
+        return frame
+
+    def get_info(self, ticker):
+        if not self._is_known(ticker):
+            return {}
+
+        seed = zlib.crc32(ticker.encode('utf-8'))
+        frame = self._full_series(ticker)
+        year = frame.iloc[-252:]
+        current_price = float(frame['Close'].iloc[-1])
+        previous_close = float(frame['Close'].iloc[-2]) if len(frame) > 1 else current_price
+        shares_outstanding = (seed % 5000 + 100) * 1_000_000
+        eps = round(current_price / (10 + seed % 30), 2)
+
+        info = {
+            'symbol': ticker,
+            'quoteType': 'EQUITY',
+            'longName': f"{ticker} Holdings Inc.",
+            'shortName': ticker,
+            'sector': self.SECTORS[seed % len(self.SECTORS)],
+            'industry': 'Synthetic Data',
+            'exchange': 'NMS',
+            'currentPrice': current_price,
+            'regularMarketPrice': current_price,
+            'previousClose': previous_close,
+            'open': float(frame['Open'].iloc[-1]),
+            'volume': int(frame['Volume'].iloc[-1]),
+            'averageVolume': int(year['Volume'].mean()),
+            'marketCap': current_price * shares_outstanding,
+            'trailingPE': round(current_price / eps, 2) if eps else 0,
+            'trailingEps': eps,
+            'dividendYield': (seed % 40) / 1000 if seed % 3 == 0 else None,
+            'fiftyTwoWeekLow': float(year['Low'].min()),
+            'fiftyTwoWeekHigh': float(year['High'].max()),
+            'longBusinessSummary': f"{ticker} is a synthetic company generated by the offline fixture market data provider.",
+        }
+        info.update(self._overrides.get(ticker, {}))
+        return info
+
+    def get_quote(self, ticker):
+        if not self._is_known(ticker):
+            return {}
+        if 'currentPrice' in self._overrides.get(ticker, {}):
+            return super().get_quote(ticker)
+        frame = self._full_series(ticker)
+        return {
+            'price': float(frame['Close'].iloc[-1]),
+            'previous_close': float(frame['Close'].iloc[-2]) if len(frame) > 1 else None,
+            'volume': int(frame['Volume'].iloc[-1]),
+        }
+
+    def get_history(self, ticker, period='1mo', start=None):
+        if not self._is_known(ticker):
+            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+        frame = self._full_series(ticker)
+        if start is not None:
+            return frame[frame.index.date >= start]
+        return _slice_period(frame, period)
+
+
+def _slice_period(frame, period):
+    """
+    Cut a daily bar frame down to a yfinance-style period ending at its last bar.
+
+    Args:
+        frame (pandas.DataFrame): Bars indexed by tz-aware date
+        period (str): yfinance period string
+
+    Returns:
+        pandas.DataFrame: The trailing slice covering the period
+    """
+    if frame.empty or period == 'max':
+        return frame
+
+    # Day periods count trading days, as yfinance does
+    day_match = re.match(r'^(\d+)d$', period)
+    if day_match:
+        return frame.iloc[-int(day_match.group(1)):]
+
+    end = frame.index[-1]
+    offsets = {
+        '1mo': pd.DateOffset(months=1),
+        '3mo': pd.DateOffset(months=3),
+        '6mo': pd.DateOffset(months=6),
+        '1y': pd.DateOffset(years=1),
+        '2y': pd.DateOffset(years=2),
+        '5y': pd.DateOffset(years=5),
+        '10y': pd.DateOffset(years=10),
+    }
+    if period == 'ytd':
+        start = end.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    elif period in offsets:
+        start = end - offsets[period]
+    else:
+        raise ValueError(f"Unsupported period: {period}")
+    return frame[frame.index >= start]
+
+
+class MeteredProvider(MarketDataProvider):
+    """
+    Wraps another provider and records the latency and outcome of every call,
+    both in the process metrics and in the current request's timing breakdown.
+
+    Applied directly around the upstream provider, so the timings cover the
+    data source itself and not rate limit waits or request budgets.
+    """
+
+    def __init__(self, provider):
+        """
+        Wrap a provider.
+
+        Args:
+            provider (MarketDataProvider): Provider doing the actual fetches
+        """
+        self.provider = provider
+        self.name = provider.name
+        self.remote = provider.remote
+
+    def _call(self, call, method, *args, **kwargs):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = method(*args, **kwargs)
+            outcome = 'ok'
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            _upstream_duration.observe(elapsed, provider=self.name, call=call, outcome=outcome)
+            request_timing.record('market', elapsed)
+
+    def get_info(self, ticker):
+        return self._call('info', self.provider.get_info, ticker)
+
+    def get_quote(self, ticker):
+        return self._call('quote', self.provider.get_quote, ticker)
+
+    def get_history(self, ticker, period='1mo', start=None):
+        return self._call('history', self.provider.get_history, ticker, period=period, start=start)
+
+    def get_closes(self, tickers, day):
+        return self._call('closes', self.provider.get_closes, tickers, day)
+
+
+class GuardedProvider(MarketDataProvider):
+    """
+    Wraps another provider with a rate limiter, a circuit breaker and timeouts.
+
+    Each call first takes a token from the bucket (waiting briefly if needed)
+    and is then run through the circuit breaker. Calls that are rate limited
+    or hit an open circuit raise UpstreamUnavailable immediately, without
+    touching the upstream, so callers can go straight to cached data.
+
+    With a timeout, the upstream call runs on a small dedicated thread pool
+    and the caller waits at most the timeout or the time left in its request
+    budget (see app.utils.deadline), whichever is shorter. Either way the
+    caller gets DeadlineExceeded, but only a call that used the full timeout
+    counts as a breaker failure; one cut short by its request's budget says
+    nothing about the upstream. When every pool thread is still busy with
+    earlier calls, new calls are rejected with UpstreamUnavailable instead of
+    queueing behind a slow upstream, also without counting as a failure.
+    """
+
+    def __init__(self, provider, limiter=None, breaker=None, max_wait=2.0, timeout=None, max_concurrent=16):
+        """
+        Wrap a provider.
+
+        Args:
+            provider (MarketDataProvider): Provider doing the actual fetches
+            limiter (TokenBucket): Optional rate limiter shared by all calls
+            breaker (CircuitBreaker): Optional circuit breaker shared by all calls
+            max_wait (float): Longest time to wait for a rate limit token in seconds
+            timeout (float): Longest time to wait for an upstream call in seconds
+            max_concurrent (int): Upstream calls allowed in flight when timeouts are used
+        """
+        self.provider = provider
+        self.name = provider.name
+        self.remote = provider.remote
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._executor = None
+        self._slots = None
+        if timeout:
+            self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='market-call')
+            # One slot per pool thread, so calls are never queued behind a stuck upstream
+            self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def _call(self, method, *args, **kwargs):
+        budget = deadline.remaining()
+        if budget is not None and budget <= 0:
+            _upstream_rejections.inc(reason='budget')
+            raise DeadlineExceeded("Request time budget for market data is used up")
+        if self.breaker is not None and self.breaker.is_rejecting():
+            _upstream_rejections.inc(reason='circuit_open')
+            raise UpstreamUnavailable(f"Circuit for {self.breaker.name} is open")
+        max_wait = self.max_wait if budget is None else min(self.max_wait, budget)
+        if self.limiter is not None and not self.limiter.acquire(max_wait):
+            _upstream_rejections.inc(reason='rate_limited')
+            raise UpstreamUnavailable(f"Rate limit reached for {self.name}")
+        if self._executor is None:
+            return self._call_directly(method, *args, **kwargs)
+
+        # Rejections that say nothing about the upstream stay out of the breaker's accounting
+        if not self._slots.acquire(blocking=False):
+            # Every thread is still waiting on earlier calls; do not queue more behind them
+            _upstream_rejections.inc(reason='saturated')
+            raise UpstreamUnavailable(f"All {self.name} call slots are busy")
+        wait = self.timeout if budget is None else min(self.timeout, budget)
+        try:
+            if self.breaker is not None:
+                self.breaker.before_call()
+            future = self._executor.submit(request_timing.propagate(method), *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            result = future.result(timeout=wait)
+        except FuturesTimeout:
+            # A call that has not started is dropped; a running one finishes and its result is discarded
+            future.cancel()
+            if wait < self.timeout:
+                # The request ran out of budget before the upstream ran out of time
+                _upstream_rejections.inc(reason='budget')
+                if self.breaker is not None:
+                    self.breaker.release()
+                raise DeadlineExceeded(f"Request budget ran out after {wait:.2f}s waiting for {self.name}")
+            _upstream_rejections.inc(reason='timeout')
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise DeadlineExceeded(f"{self.name} call did not finish within {wait:.2f}s")
+        except Exception:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise
+        if self.breaker is not None:
+            self.breaker.record_success()
+        return result
+
+    def _call_directly(self, method, *args, **kwargs):
+        """Run an upstream call on the calling thread (no timeout configured)."""
+        if self.breaker is None:
+            return method(*args, **kwargs)
+        self.breaker.before_call()
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def get_info(self, ticker):
+        return self._call(self.provider.get_info, ticker)
+
+    def get_quote(self, ticker):
+        return self._call(self.provider.get_quote, ticker)
+
+    def get_history(self, ticker, period='1mo', start=None):
+        return self._call(self.provider.get_history, ticker, period=period, start=start)
+
+    def get_closes(self, tickers, day):
+        return self._call(self.provider.get_closes, tickers, day)
+
+
+# Active provider shared by all market data helpers
+_provider = None
+
+
+def create_provider(name, fixture_path=None):
+    """
+    Build a market data provider by name.
+
+    Args:
+        name (str): 'yfinance' or 'fixture'
+        fixture_path (str): Optional JSON fixture file for the fixture provider
+
+    Returns:
+        MarketDataProvider: The configured provider
+    """
+    name = (name or 'yfinance').lower()
+    if name == 'yfinance':
+        return YFinanceProvider()
+    if name == 'fixture':
+        return FixtureProvider(fixture_path)
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+def get_provider():
+    """Return the active market data provider, defaulting to Yahoo Finance."""
+    global _provider
+    if _provider is None:
+        _provider = YFinanceProvider()
+    return _provider
+
+
+def set_provider(provider):
+    """Replace the active market data provider."""
+    global _provider
+    _provider = provider
+
+
+def init_market_data(app):
+    """
+    Select the market data provider from the Flask app configuration.
+
+    Every provider is metered; network-backed providers are also wrapped in
+    a rate limiter, circuit breaker and call timeout when MARKET_RATE_LIMIT,
+    MARKET_CIRCUIT_THRESHOLD or MARKET_CALL_TIMEOUT is set.
+
+    Args:
+        app: Flask application with MARKET_DATA_PROVIDER configured
+    """
+    provider = create_provider(app.config.get('MARKET_DATA_PROVIDER'),
+                               app.config.get('MARKET_DATA_FIXTURE_PATH'))
+    provider = MeteredProvider(provider)
+    
+    rate = app.config.get('MARKET_RATE_LIMIT')
+    threshold = app.config.get('MARKET_CIRCUIT_THRESHOLD')
+    timeout = app.config.get('MARKET_CALL_TIMEOUT')
+    if provider.remote and (rate or threshold or timeout):
+        provider = GuardedProvider(
+            provider,
+            limiter=TokenBucket(rate, app.config.get('MARKET_RATE_BURST') or rate) if rate else None,
+            breaker=CircuitBreaker(threshold, app.config.get('MARKET_CIRCUIT_RESET', 30), name=provider.name) if threshold else None,
+            max_wait=app.config.get('MARKET_RATE_MAX_WAIT', 2.0),
+            timeout=timeout or None,
+        )
+    set_provider(provider)
+    logger.info(f"Using '{provider.name}' market data provider")
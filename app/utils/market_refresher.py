@@ -0,0 +1,215 @@
+"""
+Background market data refresher for the Yale Trading Simulation Platform.
+Periodically re-fetches the tickers users are most likely to request (trending
+list, market summary ETFs and every held stock) so requests hit a warm cache.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.utils import market_calendar, previous_close, stock_utils
+from app.utils.market_data import MARKET_TZ
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks, every worker refreshes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Longest sleep between cycles while the market is closed (cold tickers are still filled)
+OFF_HOURS_INTERVAL = 30 * 60
+
+
+def is_market_hours(now=None):
+    """
+    Check whether US equity markets are in (or just after) their regular session.
+
+    Args:
+        now (datetime): Time to check (defaults to the current time)
+
+    Returns:
+        bool: True during an NYSE session or while its closing prices settle
+    """
+    return market_calendar.is_open(now, after_close=market_calendar.CLOSE_SETTLE)
+
+
+def seconds_until_next_cycle(interval, now=None):
+    """
+    Get how long the refresher should wait before its next cycle.
+
+    Args:
+        interval (float): Seconds between cycles during the session
+        now (datetime): Reference time (defaults to the current time)
+
+    Returns:
+        float: interval while trading; otherwise the time to the next open, capped at OFF_HOURS_INTERVAL
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if is_market_hours(now):
+        return interval
+    until_open = (market_calendar.next_open(now) - now).total_seconds()
+    return max(interval, min(until_open, OFF_HOURS_INTERVAL))
+
+
+class MarketRefresher:
+    """
+    Daemon thread that keeps hot tickers warm in the stock cache.
+
+    Each cycle gathers the trending tickers, the market summary ETFs and every
+    distinct ticker in the StockHolding table, then refreshes those whose
+    cache entries are missing or will expire before the next cycle, in
+    batches on a dedicated thread pool. Outside market hours (per the NYSE
+    calendar) only tickers with no cached data at all are fetched, and
+    cycles slow down until the next session opens. Each cycle also makes
+    sure the previous session's closes of those tickers are stored, so day
+    changes never need a bulk download inside a request.
+
+    When several workers share a host-wide cache, only the worker holding
+    the refresher lock file does the work; the others retry each cycle and
+    take over if the leader exits.
+    """
+
+    def __init__(self, app, interval=60, workers=4, batch_size=20, lock_path=None):
+        """
+        Configure the refresher.
+
+        Args:
+            app: Flask application (used for database access)
+            interval: Seconds between refresh cycles
+            workers: Concurrent upstream fetches per batch
+            batch_size: Tickers refreshed per batch
+            lock_path: Optional lock file electing one refresher per host
+        """
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lock_path = lock_path
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='market-refresh')
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+
+    def start(self):
+        """Start the background thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='market-refresher', daemon=True)
+        self._thread.start()
+        logger.info(f"Market refresher started (interval={self.interval}s)")
+
+    def stop(self):
+        """Signal the background thread to exit after its current cycle."""
+        self._stop.set()
+
+    def _is_leader(self):
+        """Try to hold the host-wide refresher lock; True if this process owns it."""
+        if not self.lock_path or fcntl is None:
+            return True
+        if self._lock_file is not None:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"Process {os.getpid()} is the market refresher leader")
+        return True
+
+    def hot_tickers(self):
+        """
+        Collect the tickers worth keeping warm.
+
+        Returns:
+            list: Trending, market summary and held tickers without duplicates
+        """
+        from app import db
+        from app.models.stock import StockHolding
+
+        tickers = [index for index, _ in stock_utils.MARKET_INDICES]
+        tickers += stock_utils.TRENDING_TICKERS
+        try:
+            with self.app.app_context():
+                held = db.session.query(StockHolding.ticker).distinct().all()
+                tickers += [row[0] for row in held]
+        except Exception as e:
+            logger.error(f"Market refresher could not load held tickers: {str(e)}")
+        return list(dict.fromkeys(t.upper() for t in tickers))
+
+    def refresh_once(self):
+        """
+        Run a single refresh cycle.
+
+        Returns:
+            int: Number of tickers fetched upstream
+        """
+        tickers = self.hot_tickers()
+        try:
+            with self.app.app_context():
+                previous_close.warm_previous_closes(tickers)
+        except Exception as e:
+            logger.error(f"Market refresher could not store previous closes: {str(e)}")
+
+        if is_market_hours():
+            # Refresh anything that would expire before the next cycle
+            min_remaining = self.interval
+        else:
+            # Prices are not moving; only fill tickers with nothing cached
+            min_remaining = float('-inf')
+
+        fetched = 0
+        for start in range(0, len(tickers), self.batch_size):
+            if self._stop.is_set():
+                break
+            batch = tickers[start:start + self.batch_size]
+            fetched += stock_utils.refresh_stock_infos(batch, min_remaining=min_remaining, executor=self._executor)
+        return fetched
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                if self._is_leader():
+                    fetched = self.refresh_once()
+                    if fetched:
+                        logger.info(f"Market refresher fetched {fetched} tickers in {time.time() - started:.1f}s")
+            except Exception as e:
+                logger.error(f"Market refresher cycle failed: {str(e)}")
+            self._stop.wait(max(1, seconds_until_next_cycle(self.interval) - (time.time() - started)))
+
+
+# Refresher running in this process, if any
+_refresher = None
+
+
+def start_market_refresher(app):
+    """
+    Start the background refresher if MARKET_REFRESH_ENABLED is set.
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        MarketRefresher: The running refresher, or None if disabled
+    """
+    global _refresher
+    if not app.config.get('MARKET_REFRESH_ENABLED'):
+        return None
+    if _refresher is not None:
+        return _refresher
+
+    shared_cache_path = app.config.get('MARKET_SHARED_CACHE_PATH')
+    _refresher = MarketRefresher(
+        app,
+        interval=app.config.get('MARKET_REFRESH_INTERVAL', 60),
+        workers=app.config.get('MARKET_REFRESH_WORKERS', 4),
+        batch_size=app.config.get('MARKET_REFRESH_BATCH_SIZE', 20),
+        lock_path=f"{shared_cache_path}.refresher.lock" if shared_cache_path else None,
+    )
+    _refresher.start()
+    return _refresher
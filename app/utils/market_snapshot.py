@@ -0,0 +1,187 @@
+"""
+Last-known-good market data snapshots for the Yale Trading Simulation Platform.
+Periodically saves the quote and fundamentals cache tiers to a compressed
+file and loads it when the app starts, so restarted workers begin warm and
+fall back to recent prices instead of the static backup lists.
+"""
+import atexit
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+
+from app.utils import stock_utils
+from app.utils.shared_cache import _json_default
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks, concurrent saves may drop entries
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def _read_entries(path):
+    """
+    Read the entries of a snapshot file.
+
+    Args:
+        path (str): Snapshot file path
+
+    Returns:
+        list: (key, value, stored_at, expires_at) tuples; empty if the file is
+        missing or has an unknown version
+    """
+    if not os.path.exists(path):
+        return []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        payload = json.load(f)
+    if payload.get('version') != SNAPSHOT_VERSION:
+        logger.warning(f"Ignoring market snapshot {path} with unknown version {payload.get('version')}")
+        return []
+    return [tuple(entry) for entry in payload.get('entries', [])]
+
+
+def save_snapshot(path):
+    """
+    Merge the current quote and fundamentals cache tiers into the snapshot on disk.
+
+    Every worker saves to the same file, so the entries already saved by
+    other workers are kept and the newer entry wins for each key. The
+    read-merge-write runs under an exclusive lock on `<path>.lock`, and the
+    file is written under a temporary name and renamed into place so readers
+    never see a partial file.
+
+    Args:
+        path (str): Snapshot file path
+
+    Returns:
+        int: Number of entries written
+    """
+    current = stock_utils.snapshot_stock_cache()
+    if not current:
+        return 0
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            saved = _read_entries(path)
+        except Exception as e:
+            logger.warning(f"Replacing unreadable market snapshot {path}: {str(e)}")
+            saved = []
+
+        now = time.time()
+        merged = {}
+        for entry in saved + current:
+            key, _, stored_at, expires_at = entry
+            if now - expires_at > stock_utils.SNAPSHOT_MAX_AGE:
+                continue
+            if key not in merged or stored_at >= merged[key][2]:
+                merged[key] = entry
+        entries = list(merged.values())
+
+        payload = {'version': SNAPSHOT_VERSION, 'saved_at': now, 'entries': entries}
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                json.dump(payload, f, default=_json_default, separators=(',', ':'))
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return len(entries)
+
+
+def load_snapshot(path):
+    """
+    Warm the stock cache from a snapshot file, if one exists.
+
+    Args:
+        path (str): Snapshot file path
+
+    Returns:
+        int: Number of entries restored
+    """
+    return stock_utils.restore_stock_cache(_read_entries(path))
+
+
+class SnapshotWriter:
+    """Daemon thread that saves a market data snapshot every `interval` seconds."""
+
+    def __init__(self, path, interval=300):
+        """
+        Configure the writer.
+
+        Args:
+            path: Snapshot file path
+            interval: Seconds between saves
+        """
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def save(self):
+        """Save a snapshot now, logging (not raising) any failure."""
+        try:
+            count = save_snapshot(self.path)
+            if count:
+                logger.info(f"Saved market snapshot with {count} entries to {self.path}")
+        except Exception as e:
+            logger.error(f"Could not save market snapshot to {self.path}: {str(e)}")
+
+    def start(self):
+        """Start the background thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='market-snapshot', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Signal the background thread to exit."""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.save()
+
+
+# Writer running in this process, if any
+_writer = None
+
+
+def init_market_snapshot(app):
+    """
+    Load the MARKET_SNAPSHOT_PATH snapshot and start saving new ones periodically.
+
+    Args:
+        app: Flask application instance
+
+    Returns:
+        SnapshotWriter: The running writer, or None if snapshots are disabled
+    """
+    global _writer
+    path = app.config.get('MARKET_SNAPSHOT_PATH')
+    if not path:
+        return None
+
+    try:
+        restored = load_snapshot(path)
+        if restored:
+            logger.info(f"Warmed market data cache with {restored} entries from {path}")
+    except Exception as e:
+        logger.error(f"Could not load market snapshot {path}: {str(e)}")
+
+    if _writer is None:
+        _writer = SnapshotWriter(path, interval=app.config.get('MARKET_SNAPSHOT_INTERVAL', 300))
+        _writer.start()
+        atexit.register(_writer.save)
+    return _writer
@@ -0,0 +1,435 @@
+"""
+Metrics for the Yale Trading Simulation Platform.
+Provides thread-safe counters and histograms registered by name, rendered in
+the Prometheus text exposition format by the /metrics endpoint. Each worker
+process counts in memory and saves its values to a per-host store (see
+app.utils.metrics_store), so /metrics reports the sum over every worker.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+
+from app.utils.metrics_store import MetricsFlusher, MetricsStore
+from app.utils.query_events import add_query_observer
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from a cache hit to a slow upstream download
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    """Escape a label value for the text exposition format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=None):
+    """Render a {name="value",...} label set (empty string when there are no labels)."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    """Render a sample value, using Prometheus spellings for infinities."""
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels."""
+
+    type_name = 'counter'
+    live_only = False  # Keep summing the values of workers that have exited
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Create a counter.
+
+        Args:
+            name: Metric name (e.g. 'market_cache_lookups_total')
+            documentation: HELP text
+            labelnames: Names of the labels each sample carries
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        """
+        Add to the counter.
+
+        Args:
+            amount: Non-negative increment
+            **labels: Value for each of the counter's label names
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        """
+        Replace the value for a label set (for totals counted elsewhere and copied in by a collector).
+
+        Args:
+            value: New value
+            **labels: Value for each of the metric's label names
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        """Return the current count for a label set."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def snapshot(self):
+        """Return a copy of the counts, keyed by label values."""
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def combine(total, value):
+        """Add one process's count to a running total."""
+        return total + value
+
+    def samples(self, values=None):
+        """
+        Render the counter's samples.
+
+        Args:
+            values: Counts to render, keyed by label values (defaults to this process's)
+
+        Returns:
+            list: Exposition lines, one per label set
+        """
+        values = self.snapshot() if values is None else values
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down, such as a cache's size.
+
+    Host totals only include workers that saved recently, so the size of a
+    cache in a worker that has exited stops counting.
+    """
+
+    type_name = 'gauge'
+    live_only = True
+
+
+class Histogram:
+    """Distribution of observed values (usually durations) in cumulative buckets."""
+
+    type_name = 'histogram'
+    live_only = False
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Create a histogram.
+
+        Args:
+            name: Metric name (e.g. 'http_request_duration_seconds')
+            documentation: HELP text
+            labelnames: Names of the labels each sample carries
+            buckets: Increasing bucket upper bounds; +Inf is added automatically
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def observe(self, value, **labels):
+        """
+        Record one observation.
+
+        Args:
+            value: Observed value
+            **labels: Value for each of the histogram's label names
+        """
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the enclosed block takes, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        """Return the number of observations for a label set."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[-1] if state else 0
+
+    def snapshot(self):
+        """Return a copy of the bucket counts, sum and count, keyed by label values."""
+        with self._lock:
+            return {key: list(state) for key, state in self._values.items()}
+
+    @staticmethod
+    def combine(total, value):
+        """Add one process's buckets, sum and count to a running total."""
+        if len(total) != len(value):
+            # Saved by a process running different bucket bounds
+            return total
+        return [a + b for a, b in zip(total, value)]
+
+    def samples(self, values=None):
+        """
+        Render the histogram's bucket, sum and count samples.
+
+        Args:
+            values: States to render, keyed by label values (defaults to this process's)
+
+        Returns:
+            list: Exposition lines for every label set
+        """
+        values = self.snapshot() if values is None else values
+        lines = []
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, state):
+                cumulative += bucket_count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics, rendered together for scraping."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        """Return the metric called name, creating it on first use."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type_name}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """Get or create a Counter."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Get or create a Histogram."""
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def gauge(self, name, documentation, labelnames=()):
+        """Get or create a Gauge."""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def add_collector(self, collector):
+        """
+        Register a function that updates metrics from state kept elsewhere.
+
+        Collectors run before every snapshot and render.
+
+        Args:
+            collector: Callable taking no arguments
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def _collect(self):
+        """Run the registered collectors, logging (not raising) their failures."""
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.error(f"Metrics collector {collector.__name__} failed: {str(e)}")
+
+    def snapshot(self):
+        """
+        Copy the values of every metric.
+
+        Returns:
+            dict: {metric name: {label values tuple: value}}
+        """
+        self._collect()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def combine(self, rows, live_after=0):
+        """
+        Sum values saved by several processes.
+
+        Args:
+            rows: (metric name, label values tuple, value, saved at) rows from MetricsStore.load()
+            live_after: Gauge rows saved before this time are from exited workers and skipped
+
+        Returns:
+            dict: {metric name: {label values tuple: total}}; unknown metrics are skipped
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+        totals = {}
+        for name, key, value, updated_at in rows:
+            metric = metrics.get(name)
+            if metric is None or (metric.live_only and updated_at < live_after):
+                continue
+            samples = totals.setdefault(name, {})
+            samples[key] = metric.combine(samples[key], value) if key in samples else value
+        return totals
+
+    def render(self, values=None):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Args:
+            values: Totals from combine() to render instead of this process's values
+
+        Returns:
+            str: Exposition document
+        """
+        if values is None:
+            self._collect()
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples(None if values is None else values.get(metric.name, {})))
+        return '\n'.join(lines) + '\n'
+
+
+# Registry shared by the whole process
+REGISTRY = MetricsRegistry()
+
+# Saves REGISTRY to the per-host store; None when METRICS_STORE_PATH is empty
+_flusher = None
+
+
+def counter(name, documentation, labelnames=()):
+    """Get or create a Counter in the process registry."""
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Get or create a Histogram in the process registry."""
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+
+def gauge(name, documentation, labelnames=()):
+    """Get or create a Gauge in the process registry."""
+    return REGISTRY.gauge(name, documentation, labelnames)
+
+
+_request_duration = histogram('http_request_duration_seconds', 'Request latency by endpoint',
+                              ('endpoint', 'method', 'status'))
+_db_queries = counter('db_queries_total', 'SQL statements executed, by statement type', ('statement',))
+_db_duration = histogram('db_query_duration_seconds', 'SQL statement execution time')
+
+
+def _statement_type(statement):
+    """First keyword of a SQL statement (SELECT, INSERT, ...), used as a low-cardinality label."""
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else 'UNKNOWN'
+
+
+def _observe_query(statement, seconds):
+    _db_duration.observe(seconds)
+    _db_queries.inc(statement=_statement_type(statement))
+
+
+def render_metrics():
+    """
+    Render the metrics of every worker on the host, or of this process when there is no store.
+
+    Returns:
+        str: Exposition document
+    """
+    if _flusher is None:
+        return REGISTRY.render()
+    _flusher.ensure_started()
+    _flusher.flush()
+    # Workers save every interval; one that missed several saves has exited
+    live_after = time.time() - 3 * _flusher.interval
+    return REGISTRY.render(REGISTRY.combine(_flusher.store.load(), live_after=live_after))
+
+
+def init_metrics(app):
+    """
+    Record request latency and SQL statements for the /metrics endpoint.
+
+    Values are saved to the METRICS_STORE_PATH file every METRICS_FLUSH_INTERVAL
+    seconds so that /metrics, served by any worker, reports host-wide totals.
+
+    Args:
+        app: Flask application instance
+    """
+    global _flusher
+    if not app.config.get('METRICS_ENABLED'):
+        return
+
+    path = app.config.get('METRICS_STORE_PATH')
+    if path and _flusher is None:
+        try:
+            _flusher = MetricsFlusher(MetricsStore(path), REGISTRY,
+                                      interval=app.config.get('METRICS_FLUSH_INTERVAL', 10))
+            logger.info(f"Sharing metrics between workers through {path}")
+        except Exception as e:
+            logger.error(f"Could not open metrics store at {path}: {str(e)}")
+
+    add_query_observer(_observe_query)
+
+    @app.before_request
+    def start_request_timer():
+        if _flusher is not None:
+            _flusher.ensure_started()
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_duration(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            _request_duration.observe(time.perf_counter() - started, endpoint=request.endpoint or 'unmatched',
+                                      method=request.method, status=response.status_code)
+        return response
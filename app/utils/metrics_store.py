@@ -0,0 +1,140 @@
+"""
+Host-wide metrics store for the Yale Trading Simulation Platform.
+Backed by a local SQLite file next to the shared market data cache: every
+gunicorn worker periodically saves its metric values under its own process id,
+and /metrics sums the rows of all workers so a scrape of any worker reports
+totals for the whole host.
+"""
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.utils.local_sqlite import LocalSQLite
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsStore(LocalSQLite):
+    """
+    Metric values of every worker process on the host, one row per process and label set.
+
+    Rows of exited workers are kept for `retention` seconds so host counters
+    do not drop when a worker is recycled. All failures are logged and
+    treated as an empty store so metrics can never break a request.
+    """
+
+    def __init__(self, path, retention=24 * 60 * 60):
+        """
+        Open (creating if needed) the metrics store file.
+
+        Args:
+            path: Filesystem path of the SQLite database
+            retention: Seconds a process's rows are kept after its last save
+        """
+        super().__init__(
+            path,
+            "CREATE TABLE IF NOT EXISTS metric_values ("
+            "process TEXT NOT NULL, name TEXT NOT NULL, labels TEXT NOT NULL, value TEXT NOT NULL, "
+            "updated_at REAL NOT NULL, PRIMARY KEY (process, name, labels))"
+        )
+        self.retention = retention
+
+    def save(self, process, values):
+        """
+        Replace one process's rows with its current values.
+
+        Args:
+            process: Id of the saving process
+            values: {metric name: {label values tuple: value}} as returned by MetricsRegistry.snapshot()
+        """
+        now = time.time()
+        rows = [(process, name, json.dumps(list(key)), json.dumps(value), now)
+                for name, samples in values.items() for key, value in samples.items()]
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO metric_values (process, name, labels, value, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)", rows)
+                conn.execute("DELETE FROM metric_values WHERE updated_at < ?", (now - self.retention,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Metrics store write failed: {str(e)}")
+
+    def load(self):
+        """
+        Read the saved values of every process.
+
+        Returns:
+            list: (metric name, label values tuple, value, saved at) rows, one per process and label set
+        """
+        try:
+            rows = self._connection().execute("SELECT name, labels, value, updated_at FROM metric_values").fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Metrics store read failed: {str(e)}")
+            return []
+        return [(name, tuple(json.loads(labels)), json.loads(value), updated_at)
+                for name, labels, value, updated_at in rows]
+
+
+class MetricsFlusher:
+    """
+    Daemon thread saving this process's metrics to the store every `interval` seconds.
+
+    Gunicorn forks workers after the app may have been loaded, so the thread
+    and the process id are tied to the pid that started them; ensure_started()
+    starts a fresh flusher in each worker.
+    """
+
+    def __init__(self, store, registry, interval=10):
+        """
+        Configure the flusher.
+
+        Args:
+            store (MetricsStore): Host-wide store
+            registry (MetricsRegistry): Registry whose values are saved
+            interval: Seconds between saves
+        """
+        self.store = store
+        self.registry = registry
+        self.interval = interval
+        self._pid = None
+        self._process = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the save thread if this process does not have one yet."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            # The pid alone could be reused by a later worker whose counters start from zero
+            self._process = f"{pid}-{uuid.uuid4().hex[:8]}"
+            self._pid = pid
+            threading.Thread(target=self._run, name='metrics-flusher', daemon=True).start()
+            atexit.register(self.flush)
+
+    def flush(self):
+        """Save this process's current values now."""
+        if self._pid == os.getpid():
+            self.store.save(self._process, self.registry.snapshot())
+
+    def _run(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Metrics flush failed: {str(e)}")
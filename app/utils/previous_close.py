@@ -0,0 +1,194 @@
+"""
+Previous-close store for the Yale Trading Simulation Platform.
+Keeps each ticker's close from the prior trading session, fetched in one bulk
+request per trading day, so day-change figures need no per-ticker history calls.
+The bulk download for every held ticker runs in the background refresher
+(warm_previous_closes); requests only fetch the few tickers it did not cover.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from flask import has_app_context
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.stock import PreviousClose
+from app.utils import market_calendar
+from app.utils.cache import SingleFlight
+from app.utils.deadline import DeadlineExceeded
+from app.utils.db_upsert import upsert
+from app.utils.market_data import MARKET_TZ, get_provider
+
+logger = logging.getLogger(__name__)
+
+# Closes for the current reference session, only for tickers that have one
+_as_of = None
+_closes = {}
+# Tickers the provider had no close for -> time.monotonic() after which they are retried
+_no_close = {}
+_lock = threading.Lock()
+_inflight = SingleFlight()
+
+# Seconds before a ticker without a close is asked for again
+NO_CLOSE_RETRY = 15 * 60
+
+
+def reference_session(now=None):
+    """
+    Get the session whose close day changes are measured against.
+
+    Until the opening bell, day change still describes the last completed
+    session, so the reference is the close of the session before it.
+
+    Args:
+        now (datetime): Reference time (defaults to the current time)
+
+    Returns:
+        date: Date of the previous session's close
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    hours = market_calendar.session(now.date())
+    if hours is not None and now >= hours[0]:
+        current = now.date()
+    else:
+        current = market_calendar.previous_trading_day(now.date())
+    return market_calendar.previous_trading_day(current)
+
+
+def _load_stored(tickers, as_of):
+    """Read stored closes for a session from the database."""
+    rows = db.session.query(PreviousClose.ticker, PreviousClose.close).filter(
+        PreviousClose.as_of == as_of, PreviousClose.ticker.in_(tickers)
+    ).all()
+    return {ticker: close for ticker, close in rows}
+
+
+def _fetch(tickers, as_of):
+    """
+    Download closes for a session in one bulk call and persist them.
+
+    Closes are written through a session of their own, so the calling
+    request's session is never committed halfway through.
+
+    Args:
+        tickers (list): Ticker symbols to fetch
+        as_of (date): Session date
+
+    Returns:
+        dict: ticker -> close for tickers the provider had a close for,
+              or None if the download failed
+    """
+    logger.info(f"Fetching {as_of} closes for {len(tickers)} tickers")
+    try:
+        closes = get_provider().get_closes(tickers, as_of)
+    except Exception as e:
+        logger.warning(f"Could not fetch previous closes: {str(e)}")
+        return None
+
+    if has_app_context() and closes:
+        try:
+            with Session(db.engine) as session:
+                upsert(session, PreviousClose,
+                       [{'ticker': ticker, 'as_of': as_of, 'close': close} for ticker, close in closes.items()],
+                       ('ticker',))
+                session.commit()
+        except Exception as e:
+            logger.error(f"Could not store previous closes: {str(e)}")
+    return {ticker: closes[ticker] for ticker in tickers if closes.get(ticker)}
+
+
+def _remember(as_of, tickers, closes):
+    """Keep fetched closes in memory and hold back tickers without one for NO_CLOSE_RETRY seconds."""
+    retry_at = time.monotonic() + NO_CLOSE_RETRY
+    with _lock:
+        if _as_of != as_of:
+            return
+        _closes.update(closes)
+        for ticker in tickers:
+            if ticker not in closes:
+                _no_close[ticker] = retry_at
+
+
+def _session_state(as_of):
+    """Reset the in-memory state for a new reference session and return what is known."""
+    global _as_of, _closes, _no_close
+    now = time.monotonic()
+    with _lock:
+        if _as_of != as_of:
+            _as_of, _closes, _no_close = as_of, {}, {}
+        return dict(_closes), {ticker for ticker, retry_at in _no_close.items() if retry_at > now}
+
+
+def _load(tickers, as_of):
+    """
+    Get closes for a session from memory, then the database, then one bulk download.
+
+    Args:
+        tickers (list): Normalized ticker symbols
+        as_of (date): Session date
+
+    Returns:
+        dict: ticker -> close, for tickers that have one
+    """
+    known, skipped = _session_state(as_of)
+    missing = [ticker for ticker in tickers if ticker not in known and ticker not in skipped]
+    if missing and has_app_context():
+        try:
+            stored = _load_stored(missing, as_of)
+        except Exception as e:
+            logger.error(f"Could not read stored previous closes: {str(e)}")
+            stored = {}
+        known.update(stored)
+        _remember(as_of, [], stored)
+        missing = [ticker for ticker in missing if ticker not in stored]
+
+    if missing:
+        try:
+            fetched = _inflight.do(f"closes:{as_of}:{','.join(sorted(missing))}", _fetch, missing, as_of)
+        except DeadlineExceeded as e:
+            # Another request's download is still running; it stores the closes when done
+            logger.warning(f"{str(e)}; day changes fall back to quote previous closes")
+            fetched = None
+        if fetched is not None:
+            known.update(fetched)
+            _remember(as_of, missing, fetched)
+
+    return {ticker: known[ticker] for ticker in tickers if known.get(ticker)}
+
+
+def get_previous_closes(tickers):
+    """
+    Get the previous session's close for several tickers.
+
+    Answers from memory, then from the database, and downloads whatever is
+    still missing in a single bulk request. Tickers the provider has no
+    close for are not asked for again for NO_CLOSE_RETRY seconds.
+
+    Args:
+        tickers (list): Stock ticker symbols
+
+    Returns:
+        dict: ticker -> previous close, for tickers that have one
+    """
+    tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t))
+    return _load(tickers, reference_session())
+
+
+def warm_previous_closes(tickers):
+    """
+    Make sure the current reference session's closes are stored for tickers.
+
+    Run by the background refresher for every held and index ticker, so the
+    first portfolio view of the day does not download the whole book under a
+    request's time budget. Must run inside an app context.
+
+    Args:
+        tickers (list): Stock ticker symbols
+
+    Returns:
+        int: Number of tickers with a close for the session
+    """
+    tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t))
+    return len(_load(tickers, reference_session()))
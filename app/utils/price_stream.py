@@ -0,0 +1,255 @@
+"""
+Live price streaming for the Yale Trading Simulation Platform.
+A single in-process hub tracks which tickers are being watched (stream
+subscribers, batch price polls and recently opened stock pages), refreshes
+each of them once per cycle and pushes only the prices that changed, so the
+upstream load grows with the number of distinct tickers, not viewers.
+"""
+import logging
+import threading
+import time
+
+from app.utils import stock_utils
+
+logger = logging.getLogger(__name__)
+
+
+def price_update(quote):
+    """
+    Reduce a cached quote to the fields sent to clients.
+
+    Args:
+        quote (dict): Quote tier entry from the stock cache
+
+    Returns:
+        dict: price, change and change_percent, or None if there is no price
+    """
+    if not quote or quote.get('current_price', 0) <= 0:
+        return None
+    return {
+        'price': quote['current_price'],
+        'change': quote.get('change', 0),
+        'change_percent': quote.get('change_percent', 0),
+    }
+
+
+class PriceSubscription:
+    """
+    One client's interest in a set of tickers.
+
+    Updates are merged into a pending dict rather than queued, so a slow
+    client only ever receives the latest price for each ticker.
+    """
+
+    def __init__(self, tickers):
+        """
+        Create a subscription.
+
+        Args:
+            tickers: Normalized ticker symbols to receive updates for
+        """
+        self.tickers = frozenset(tickers)
+        self._pending = {}
+        self._ready = threading.Condition()
+
+    def push(self, updates):
+        """Add updates for this subscription's tickers and wake the waiting client."""
+        relevant = {ticker: update for ticker, update in updates.items() if ticker in self.tickers}
+        if not relevant:
+            return
+        with self._ready:
+            self._pending.update(relevant)
+            self._ready.notify()
+
+    def wait(self, timeout):
+        """
+        Wait for pending updates.
+
+        Args:
+            timeout: Longest time to wait in seconds
+
+        Returns:
+            dict: ticker -> update (empty if the wait timed out)
+        """
+        with self._ready:
+            if not self._pending:
+                self._ready.wait(timeout)
+            updates, self._pending = self._pending, {}
+        return updates
+
+
+class PricePublisher:
+    """
+    Daemon thread that keeps watched tickers fresh and pushes changed prices.
+
+    A ticker is watched while a stream subscription includes it, or for
+    `watch_ttl` seconds after it was last polled or viewed. At most
+    `max_watched` polled or viewed tickers are kept (the least recently seen
+    go first), and a ticker whose refresh yields no price is dropped until a
+    poll or view that returned a price watches it again. Every `interval`
+    seconds the hub refreshes the cached quote of each watched ticker that
+    would expire before the next cycle (one upstream fetch per ticker, however
+    many viewers it has), then pushes each ticker whose price moved to every
+    subscriber. Tickers nobody touches age out on their own. The thread
+    starts with the first subscription or watch.
+    """
+
+    def __init__(self, interval=5, watch_ttl=120, max_watched=500):
+        """
+        Configure the publisher.
+
+        Args:
+            interval: Seconds between cycles
+            watch_ttl: Seconds a polled or viewed ticker stays in the refresh set
+            max_watched: Most polled or viewed tickers kept in the refresh set
+        """
+        self.interval = interval
+        self.watch_ttl = watch_ttl
+        self.max_watched = max_watched
+        self._subscriptions = set()
+        self._watched = {}  # ticker -> time.monotonic() of last poll or view
+        self._last = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _ensure_started(self):
+        """Start the background thread if it is not running. Caller holds the lock."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='price-publisher', daemon=True)
+            self._thread.start()
+
+    def subscribe(self, tickers):
+        """
+        Register a client for price updates.
+
+        Args:
+            tickers: Ticker symbols to watch
+
+        Returns:
+            PriceSubscription: Subscription to wait on; pass it to unsubscribe() when done
+        """
+        subscription = PriceSubscription(t.upper().strip() for t in tickers if t)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            self._ensure_started()
+        return subscription
+
+    def watch(self, tickers):
+        """
+        Mark tickers as viewed, keeping them in the refresh set for watch_ttl seconds.
+
+        Callers pass only tickers they just got a price for; tickers in the
+        negative cache are ignored as well.
+
+        Args:
+            tickers: Ticker symbols a page is showing or polling
+        """
+        tickers = [t.upper().strip() for t in tickers if t]
+        tickers = [t for t in tickers if not stock_utils.is_known_missing(t)]
+        if not tickers:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for ticker in tickers:
+                # Re-insert so the dict stays ordered from least to most recently seen
+                self._watched.pop(ticker, None)
+                self._watched[ticker] = now
+            while len(self._watched) > self.max_watched:
+                del self._watched[next(iter(self._watched))]
+            self._ensure_started()
+
+    def watched_tickers(self):
+        """
+        Get the current refresh set, dropping viewed tickers past watch_ttl.
+
+        Returns:
+            list: Sorted tickers with a stream subscriber or a recent poll or view
+        """
+        cutoff = time.monotonic() - self.watch_ttl
+        with self._lock:
+            for ticker in [t for t, seen in self._watched.items() if seen < cutoff]:
+                del self._watched[ticker]
+            tickers = set(self._watched)
+            for subscription in self._subscriptions:
+                tickers |= subscription.tickers
+        return sorted(tickers)
+
+    def unsubscribe(self, subscription):
+        """Stop sending updates to a subscription."""
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def stop(self):
+        """Signal the background thread to exit."""
+        self._stop.set()
+
+    def publish_once(self):
+        """
+        Run a single poll-and-push cycle.
+
+        Returns:
+            int: Number of tickers whose price changed
+        """
+        tickers = self.watched_tickers()
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        if not tickers:
+            self._last.clear()
+            return 0
+
+        # One upstream fetch per watched ticker whose quote expires before the next cycle
+        stock_utils.refresh_stock_infos(tickers, min_remaining=self.interval)
+
+        changed = {}
+        unpriced = []
+        for ticker, quote in stock_utils.get_stock_quotes(tickers).items():
+            update = price_update(quote)
+            if update is None:
+                unpriced.append(ticker)
+            elif self._last.get(ticker) != update['price']:
+                self._last[ticker] = update['price']
+                changed[ticker] = update
+
+        # Stop refreshing polled or viewed tickers that no longer have a price
+        if unpriced:
+            with self._lock:
+                for ticker in unpriced:
+                    self._watched.pop(ticker, None)
+
+        # Forget tickers nobody watches any more
+        for ticker in set(self._last) - set(tickers):
+            del self._last[ticker]
+
+        if changed:
+            for subscription in subscriptions:
+                subscription.push(changed)
+        return len(changed)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish_once()
+            except Exception as e:
+                logger.error(f"Price publisher cycle failed: {str(e)}")
+
+
+# Hub shared by every stream, poll and page view in this process
+_publisher = PricePublisher()
+
+
+def get_publisher():
+    """Return this process's price publisher."""
+    return _publisher
+
+
+def init_price_stream(app):
+    """
+    Apply PRICE_STREAM_INTERVAL, PRICE_WATCH_TTL and PRICE_WATCH_MAX to the process-wide publisher.
+
+    Args:
+        app: Flask application instance
+    """
+    _publisher.interval = max(1, int(app.config.get('PRICE_STREAM_INTERVAL', _publisher.interval)))
+    _publisher.watch_ttl = max(_publisher.interval, int(app.config.get('PRICE_WATCH_TTL', _publisher.watch_ttl)))
+    _publisher.max_watched = max(1, int(app.config.get('PRICE_WATCH_MAX', _publisher.max_watched)))
@@ -0,0 +1,152 @@
+"""
+N+1 query detection for the Yale Trading Simulation Platform.
+An opt-in development/staging mode that counts the SQL statements each request
+issues, grouped by statement shape, and logs or raises when one request runs
+the same parameterized query more than a threshold number of times (typically
+a lazy relationship or property loaded inside a template loop).
+"""
+import logging
+import re
+import threading
+from collections import Counter
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+# Modes for QUERY_COUNTER_MODE
+MODES = ('off', 'log', 'raise')
+
+# Longest statement text included in log messages
+MAX_STATEMENT_LENGTH = 200
+
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class RepeatedQueryError(Exception):
+    """Raised in 'raise' mode when a request repeats one query shape more than the threshold allows."""
+
+
+def statement_shape(statement):
+    """
+    Normalize a SQL statement so repeats with different parameters group together.
+
+    Whitespace is collapsed, literals become '?' and placeholder lists such as
+    IN (?, ?, ?) collapse to (?), so the shape does not depend on the values.
+
+    Args:
+        statement (str): SQL text as sent to the driver
+
+    Returns:
+        str: Normalized statement
+    """
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _LITERAL.sub('?', shape)
+    return _PLACEHOLDER_LIST.sub('(?)', shape)
+
+
+def _truncate(shape):
+    """Shorten a statement for logging, keeping both ends (the WHERE clause tells repeats apart)."""
+    if len(shape) <= MAX_STATEMENT_LENGTH:
+        return shape
+    half = MAX_STATEMENT_LENGTH // 2
+    return f"{shape[:half]} ... {shape[-half:]}"
+
+
+class QueryCounter:
+    """Counts of statement shapes issued while handling one request."""
+
+    def __init__(self, threshold, raise_on_repeat=False):
+        """
+        Create an empty counter.
+
+        Args:
+            threshold: Repeats of one shape allowed before the request is flagged
+            raise_on_repeat: Raise RepeatedQueryError as soon as the threshold is exceeded
+        """
+        self.threshold = threshold
+        self.raise_on_repeat = raise_on_repeat
+        self.shapes = Counter()
+        self.total = 0
+
+    def add(self, statement):
+        """
+        Count one statement.
+
+        Raises:
+            RepeatedQueryError: In raise mode, when this statement exceeds the threshold
+        """
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        self.total += 1
+        if self.raise_on_repeat and self.shapes[shape] == self.threshold + 1:
+            raise RepeatedQueryError(
+                f"Query repeated more than {self.threshold} times in one request "
+                f"(likely N+1): {_truncate(shape)}")
+
+    def repeated(self):
+        """
+        Get the shapes issued more than threshold times.
+
+        Returns:
+            list: (shape, count) tuples, most repeated first
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > self.threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = getattr(_local, 'counter', None)
+    if counter is not None:
+        counter.add(statement)
+
+
+def init_query_counter(app):
+    """
+    Count queries per request when QUERY_COUNTER_MODE is 'log' or 'raise'.
+
+    In 'log' mode a request that repeats a statement shape more than
+    QUERY_REPEAT_THRESHOLD times gets a warning listing the repeated shapes;
+    in 'raise' mode the offending query raises RepeatedQueryError instead, so
+    the traceback points at the loop issuing it. Meant for development and
+    staging, not production.
+
+    Args:
+        app: Flask application instance
+    """
+    mode = (app.config.get('QUERY_COUNTER_MODE') or 'off').lower()
+    if mode not in MODES:
+        logger.warning(f"Unknown QUERY_COUNTER_MODE '{mode}', query counting disabled")
+        return
+    if mode == 'off':
+        return
+    threshold = max(1, int(app.config.get('QUERY_REPEAT_THRESHOLD', 10)))
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+
+    @app.before_request
+    def start_query_counter():
+        _local.counter = g.query_counter = QueryCounter(threshold, raise_on_repeat=(mode == 'raise'))
+
+    @app.after_request
+    def report_repeated_queries(response):
+        counter = g.pop('query_counter', None)
+        if counter is None:
+            return response
+        response.headers['X-Query-Count'] = str(counter.total)
+        repeated = counter.repeated()
+        if repeated:
+            details = '; '.join(f"{count}x {_truncate(shape)}" for shape, count in repeated)
+            logger.warning(f"Possible N+1 queries in {request.method} {request.path} "
+                           f"({counter.total} queries total): {details}")
+        return response
+
+    @app.teardown_request
+    def clear_query_counter(exc=None):
+        _local.counter = None
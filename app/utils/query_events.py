@@ -0,0 +1,66 @@
+"""
+Shared SQL statement timing for the Yale Trading Simulation Platform.
+A single pair of Engine listeners times every statement once and hands the
+statement and its duration to each registered observer (the /metrics counters
+and the per-request Server-Timing totals), instead of each keeping its own
+start-time bookkeeping on the connection.
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Key in Connection.info holding the start times of statements in progress
+_STARTED_KEY = 'query_events_started'
+
+_observers = []
+_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get(_STARTED_KEY)
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    for observer in _observers:
+        try:
+            observer(statement, elapsed)
+        except Exception as e:
+            logger.error(f"Query observer {observer.__name__} failed: {str(e)}")
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None:
+        started = conn.info.get(_STARTED_KEY)
+        if started:
+            started.pop()
+
+
+def add_query_observer(observer):
+    """
+    Call observer(statement, seconds) after every SQL statement that completes.
+
+    The Engine listeners are installed on the first registration; listening on
+    the Engine class covers every engine, including ones created later.
+
+    Args:
+        observer: Callable taking the statement text and its duration in seconds
+    """
+    with _lock:
+        if observer in _observers:
+            return
+        _observers.append(observer)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
@@ -0,0 +1,155 @@
+"""
+Per-request timing breakdown for the Yale Trading Simulation Platform.
+Accumulates the time each request spends in SQL statements, market data calls
+and template rendering, and reports it in a Server-Timing response header and
+one log line per request. Calls made on worker threads are summed, so the
+market data phase can exceed the request's wall-clock time.
+"""
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import g, request
+from jinja2 import Template
+
+from app.utils.query_events import add_query_observer
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+# Phases reported for every request, in header order
+PHASES = ('db', 'market', 'render')
+
+
+class RequestTimer:
+    """Thread-safe totals of time and call counts per phase for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(PHASES, 0)
+        self._lock = threading.Lock()
+
+    def record(self, phase, seconds):
+        """
+        Add one timed call to a phase.
+
+        Args:
+            phase: 'db', 'market' or 'render'
+            seconds: Duration of the call
+        """
+        with self._lock:
+            self.durations[phase] += seconds
+            self.counts[phase] += 1
+
+    def server_timing(self, total):
+        """
+        Format the totals as a Server-Timing header value.
+
+        Args:
+            total: Wall-clock duration of the whole request in seconds
+
+        Returns:
+            str: e.g. 'db;dur=4.1;desc="6 queries", market;dur=0.0;desc="0 calls", ...'
+        """
+        with self._lock:
+            durations, counts = dict(self.durations), dict(self.counts)
+        entries = [
+            f'db;dur={durations["db"] * 1000:.1f};desc="{counts["db"]} queries"',
+            f'market;dur={durations["market"] * 1000:.1f};desc="{counts["market"]} calls"',
+            f'render;dur={durations["render"] * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        return ', '.join(entries)
+
+
+def current():
+    """Return the timer of the request being handled on this thread, or None."""
+    return getattr(_local, 'timer', None)
+
+
+def record(phase, seconds):
+    """Add a timed call to the current request's totals (no-op outside a timed request)."""
+    timer = current()
+    if timer is not None:
+        timer.record(phase, seconds)
+
+
+def propagate(fn):
+    """
+    Wrap a function so time it spends is charged to the caller's request.
+
+    Args:
+        fn: Function to be submitted to a thread pool
+
+    Returns:
+        callable: Wrapper that installs the submitting thread's timer while fn runs
+    """
+    timer = current()
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        previous = current()
+        _local.timer = timer
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.timer = previous
+    return wrapper
+
+
+class TimedTemplate(Template):
+    """Jinja template that charges top-level renders to the current request."""
+
+    def render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            record('render', time.perf_counter() - started)
+
+
+def _observe_query(statement, seconds):
+    record('db', seconds)
+
+
+def init_request_timing(app):
+    """
+    Time the DB, market data and render phases of every request when SERVER_TIMING_ENABLED is set.
+
+    Args:
+        app: Flask application instance
+    """
+    if not app.config.get('SERVER_TIMING_ENABLED'):
+        return
+
+    add_query_observer(_observe_query)
+
+    # Flask's render signals need the optional blinker package, so time renders in the template class
+    app.jinja_env.template_class = TimedTemplate
+
+    @app.before_request
+    def start_request_timer():
+        _local.timer = g.request_timer = RequestTimer()
+
+    @app.after_request
+    def report_request_timing(response):
+        timer = g.pop('request_timer', None)
+        if timer is None:
+            return response
+        total = time.perf_counter() - timer.started
+        response.headers['Server-Timing'] = timer.server_timing(total)
+        logger.info(
+            f"request_timing method={request.method} path={request.path} "
+            f"endpoint={request.endpoint or 'unmatched'} status={response.status_code} "
+            f"total_ms={total * 1000:.1f} db_ms={timer.durations['db'] * 1000:.1f} db_queries={timer.counts['db']} "
+            f"market_ms={timer.durations['market'] * 1000:.1f} market_calls={timer.counts['market']} "
+            f"render_ms={timer.durations['render'] * 1000:.1f}"
+        )
+        return response
+
+    @app.teardown_request
+    def clear_request_timer(exc=None):
+        _local.timer = None
@@ -0,0 +1,104 @@
+"""
+Host-wide shared cache for market data in the Yale Trading Simulation Platform.
+Backed by a local SQLite file so every gunicorn worker on the machine reads
+and writes the same quote entries instead of each fetching its own copy.
+"""
+import json
+import logging
+import sqlite3
+import time
+
+from app.utils.local_sqlite import LocalSQLite
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value):
+    """Serialize numpy/pandas scalars that the json module does not understand."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class SharedCache(LocalSQLite):
+    """
+    Key/value cache stored in a SQLite database shared between processes.
+
+    Values are JSON-encoded with the time they were stored and when they
+    expire. Each thread gets its own connection; WAL journaling lets readers
+    in other workers proceed while one worker writes. All failures are logged
+    and treated as cache misses so the shared layer can never break a request.
+    """
+
+    PURGE_EVERY = 500  # Writes between sweeps of long-expired rows
+
+    def __init__(self, path, stale_ttl=24 * 60 * 60):
+        """
+        Open (creating if needed) the shared cache file.
+
+        Args:
+            path: Filesystem path of the SQLite database
+            stale_ttl: How long past expiry rows are kept for stale fallbacks
+        """
+        super().__init__(
+            path,
+            "CREATE TABLE IF NOT EXISTS market_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.stale_ttl = stale_ttl
+        self._writes = 0
+
+    def get(self, key):
+        """
+        Read an entry, fresh or expired.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            tuple: (value, stored_at, expires_at) or None if missing
+        """
+        try:
+            row = self._connection().execute(
+                "SELECT value, stored_at, expires_at FROM market_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read failed for {key}: {str(e)}")
+            return None
+
+        if row is None or time.time() - row[2] > self.stale_ttl:
+            return None
+        try:
+            return json.loads(row[0]), row[1], row[2]
+        except ValueError:
+            return None
+
+    def set(self, key, value, ttl):
+        """
+        Write an entry visible to every worker on the host.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Freshness lifetime in seconds
+        """
+        now = time.time()
+        try:
+            payload = json.dumps(value, default=_json_default)
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO market_cache (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now + ttl)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM market_cache WHERE expires_at < ?", (now - self.stale_ttl,))
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Shared cache write failed for {key}: {str(e)}")
+
+    def delete(self, key):
+        """Remove a key from the shared cache if present."""
+        try:
+            self._connection().execute("DELETE FROM market_cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache delete failed for {key}: {str(e)}")
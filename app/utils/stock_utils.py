@@ -1,20 +1,553 @@
 import os
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import logging
+import math
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
+from flask import has_app_context
+from app.utils import history_store
+from app.utils.cache import TTLCache, SingleFlight
+from app.utils.downsample import lttb_indices
+from app.utils import deadline, market_calendar, metrics, request_timing
+from app.utils.deadline import DeadlineExceeded
+from app.utils.market_data import MARKET_TZ, get_provider, _slice_period
+from app.utils.previous_close import get_previous_closes
+from app.utils.shared_cache import SharedCache
+from app.utils.symbol_index import get_symbol_index
+from app.utils.upstream_guard import UpstreamUnavailable
 
 logger = logging.getLogger(__name__)
 
-# Simple in-memory cache for stock data
-_stock_cache = {}
+# Bounded in-memory cache for stock data (expired entries stay available as fallbacks)
 _cache_expiry = 60 * 5  # Cache expiry in seconds (5 minutes)
+_stock_cache = TTLCache(max_entries=1000, max_bytes=8 * 1024 * 1024, default_ttl=_cache_expiry)
+
+# Stock data is cached in two tiers: a cheap, short-lived quote and long-lived fundamentals
+_quote_ttl = 60  # Price, previous close, change and volume (stretched to the next open while the market is closed)
+_fundamentals_ttl = 60 * 60 * 6  # Name, sector, ratios, description, 52-week range
+QUOTE_FIELDS = ('current_price', 'previous_close', 'change', 'change_percent', 'volume')
+
+# Optional host-wide cache shared by all worker processes (None when disabled)
+_shared_cache = None
+
+# Coalesces concurrent upstream fetches for the same ticker/period into one call
+_inflight = SingleFlight()
+
+# Stale-while-revalidate: expired entries younger than this many seconds past expiry
+# are served immediately while a background refresh runs (0 disables)
+_stale_grace = 60 * 5
+_pending_refreshes = set()
+_pending_lock = threading.Lock()
+
+# Index-tracking ETFs shown in the market summary: DIA for Dow Jones, SPY for S&P 500,
+# QQQ for NASDAQ, IWM for Russell 2000 (used instead of direct index symbols)
+MARKET_INDICES = [
+    ("DIA", "Dow Jones (DIA)"),
+    ("SPY", "S&P 500 (SPY)"),
+    ("QQQ", "NASDAQ (QQQ)"),
+    ("IWM", "Russell 2000 (IWM)"),
+]
+
+# Consistently reliable tickers for the trending and popular lists
+TRENDING_TICKERS = ["SPY", "QQQ", "AAPL", "TSLA", "NVDA", "AMD", "GOOG", "LLY", "COST", "META", "NFLX", "AMZN", "AVGO", "PLTR"]
+POPULAR_TICKERS = ["AMZN", "META", "JPM", "V", "JNJ", "PG", "KO"]
+
+# Tickers that recently returned nothing upstream; lookups skip them until this expires
+_negative_ttl = 60 * 10
+
+# Serve price history from the persistent database store (see history_store)
+_history_store_enabled = True
+
+# Longest recently loaded history frame per ticker; shorter periods are sliced from it
+_history_cache_ttl = 60 * 5
+_history_cache = TTLCache(max_entries=200, max_bytes=64 * 1024 * 1024, default_ttl=_history_cache_ttl, stale_ttl=0)
+
+# Shared worker pool for bulk lookups, bounding concurrent upstream calls per process
+_batch_workers = 8
+_batch_executor = None
+
+# Cache effectiveness and degraded-data paths, exposed at /metrics
+_cache_lookups = metrics.counter('market_cache_lookups_total', 'Stock cache lookups by tier and result (hit, shared_hit, miss)',
+                                 ('tier', 'result'))
+_cache_stale_serves = metrics.counter('market_cache_stale_serves_total',
+                                      'Expired entries served while revalidating in the background', ('tier',))
+_fallbacks = metrics.counter('market_fallbacks_total', 'Requests answered from a fallback path', ('path',))
+
+# In-process cache statistics, copied from TTLCache.stats() whenever metrics are read
+_memory_cache_lookups = metrics.counter('memory_cache_lookups_total',
+                                        'In-process cache lookups by result (hit, miss, stale_hit)', ('cache', 'result'))
+_memory_cache_evictions = metrics.counter('memory_cache_evictions_total',
+                                          'Entries evicted to stay within the entry or byte budget', ('cache',))
+_memory_cache_entries = metrics.gauge('memory_cache_entries', 'Entries held in the in-process cache', ('cache',))
+_memory_cache_bytes = metrics.gauge('memory_cache_bytes', 'Estimated size of the in-process cache', ('cache',))
+
+
+def _collect_cache_stats():
+    """Copy the stock and history caches' statistics into their metrics."""
+    for name, cache in (('stock', _stock_cache), ('history', _history_cache)):
+        stats = cache.stats()
+        _memory_cache_lookups.set(stats['hits'], cache=name, result='hit')
+        _memory_cache_lookups.set(stats['misses'], cache=name, result='miss')
+        _memory_cache_lookups.set(stats['stale_hits'], cache=name, result='stale_hit')
+        _memory_cache_evictions.set(stats['evictions'], cache=name)
+        _memory_cache_entries.set(stats['entries'], cache=name)
+        _memory_cache_bytes.set(stats['bytes'], cache=name)
+
+
+metrics.REGISTRY.add_collector(_collect_cache_stats)
+
+
+def _tier(key):
+    """Cache tier of a key ('quote', 'fundamentals', 'missing', ...), used as a metric label."""
+    return key.split(':', 1)[0]
+
+
+def init_stock_utils(app):
+    """
+    Apply market data settings from the Flask app configuration.
+    
+    Args:
+        app: Flask application instance
+    """
+    global _batch_workers, _batch_executor, _shared_cache, _stale_grace, _quote_ttl, _fundamentals_ttl
+    global _history_store_enabled, _history_cache_ttl, _negative_ttl
+    _batch_workers = max(1, int(app.config.get('MARKET_DATA_MAX_WORKERS', _batch_workers)))
+    _stale_grace = max(0, int(app.config.get('MARKET_STALE_GRACE', _stale_grace)))
+    _quote_ttl = int(app.config.get('QUOTE_CACHE_TTL', _quote_ttl))
+    _fundamentals_ttl = int(app.config.get('FUNDAMENTALS_CACHE_TTL', _fundamentals_ttl))
+    _history_store_enabled = bool(app.config.get('HISTORY_STORE_ENABLED', _history_store_enabled))
+    _history_cache_ttl = int(app.config.get('HISTORY_CACHE_TTL', _history_cache_ttl))
+    _negative_ttl = max(0, int(app.config.get('TICKER_NEGATIVE_CACHE_TTL', _negative_ttl)))
+    _stock_cache.resize(max_entries=app.config.get('STOCK_CACHE_MAX_ENTRIES'),
+                        max_bytes=app.config.get('STOCK_CACHE_MAX_BYTES'))
+    if _batch_executor is not None:
+        _batch_executor.shutdown(wait=False)
+    _batch_executor = None
+    
+    shared_cache_path = app.config.get('MARKET_SHARED_CACHE_PATH')
+    _shared_cache = None
+    if shared_cache_path:
+        try:
+            _shared_cache = SharedCache(shared_cache_path)
+            logger.info(f"Using shared market data cache at {shared_cache_path}")
+        except Exception as e:
+            logger.error(f"Could not open shared market data cache at {shared_cache_path}: {str(e)}")
+
+
+def _cache_get(key):
+    """
+    Get a fresh cached value, checking this worker's cache before the shared one.
+    
+    Entries found in the shared cache are copied into the local cache (with
+    their remaining lifetime) so later lookups and stale fallbacks stay local.
+    
+    Args:
+        key (str): Cache key
+        
+    Returns:
+        The cached value or None if no fresh entry exists
+    """
+    value = _stock_cache.get(key)
+    if value is not None or _shared_cache is None:
+        _cache_lookups.inc(tier=_tier(key), result='miss' if value is None else 'hit')
+        return value
+    
+    entry = _shared_cache.get(key)
+    if entry is None:
+        _cache_lookups.inc(tier=_tier(key), result='miss')
+        return None
+    value, stored_at, expires_at = entry
+    remaining = expires_at - time.time()
+    _stock_cache.set(key, value, ttl=remaining)
+    _cache_lookups.inc(tier=_tier(key), result='shared_hit' if remaining > 0 else 'miss')
+    return value if remaining > 0 else None
+
+
+def _shared_fetch(key, fallback, fn, *args):
+    """
+    Run fn(*args) once for all concurrent callers of key
+    
+    A caller that joined someone else's fetch and runs out of request budget
+    while waiting gets fallback() instead; the fetch itself carries on and
+    fills the cache for later requests.
+    
+    Args:
+        key (str): Single-flight key
+        fallback: Function returning the value to use when the wait is cut short
+        fn: Function doing the fetch
+        
+    Returns:
+        fn's result, or fallback()'s
+    """
+    try:
+        return _inflight.do(key, fn, *args)
+    except DeadlineExceeded as e:
+        logger.warning(f"{str(e)}; answering from the cache")
+        return fallback()
+
+
+def _stale_quote(formatted_ticker):
+    """Get the cached quote of any age, or None."""
+    return _cache_get_stale(_quote_key(formatted_ticker))
+
+
+def _cache_get_stale(key):
+    """
+    Get a cached value regardless of age, for use as a fallback.
+    
+    Args:
+        key (str): Cache key
+        
+    Returns:
+        The cached value or None if nothing is cached
+    """
+    value = _stock_cache.get_stale(key)
+    if value is None and _shared_cache is not None:
+        entry = _shared_cache.get(key)
+        value = entry[0] if entry else None
+    if value is not None:
+        _fallbacks.inc(path=f"stale_{_tier(key)}")
+    return value
+
+
+def _refresh_in_background(key, fn, *args):
+    """
+    Schedule a coalesced refresh on the shared worker pool, at most one per key.
+    
+    Args:
+        key (str): Single-flight key identifying the refresh
+        fn: Function that fetches and caches the fresh value
+    """
+    with _pending_lock:
+        if key in _pending_refreshes:
+            return
+        _pending_refreshes.add(key)
+    
+    def run():
+        try:
+            _inflight.do(key, fn, *args)
+        except Exception as e:
+            logger.error(f"Background refresh failed for {key}: {str(e)}")
+        finally:
+            with _pending_lock:
+                _pending_refreshes.discard(key)
+    
+    try:
+        _get_batch_executor().submit(run)
+    except RuntimeError as e:
+        # Executor is shutting down; the next request will fetch synchronously
+        with _pending_lock:
+            _pending_refreshes.discard(key)
+        logger.warning(f"Could not schedule background refresh for {key}: {str(e)}")
+
+
+def _get_revalidating(key, refresh_key, refresh_fn, *args):
+    """
+    Get a cached value, serving recently expired data while it revalidates
+    
+    Args:
+        key (str): Cache key
+        refresh_key (str): Single-flight key of the refresh that repopulates it
+        refresh_fn: Function that fetches and caches the fresh value
+        
+    Returns:
+        The cached value, or None if a synchronous fetch is needed
+    """
+    value = _cache_get(key)
+    if value is not None:
+        return value
+    
+    if _stale_grace > 0:
+        # _cache_get has already copied any shared entry into the local cache
+        entry = _stock_cache.peek(key)
+        if entry is not None and time.time() - entry[2] < _stale_grace:
+            logger.info(f"Serving stale {key} while refreshing in background")
+            _cache_stale_serves.inc(tier=_tier(key))
+            _refresh_in_background(refresh_key, refresh_fn, *args)
+            return entry[0]
+    return None
+
+
+def _fundamentals_key(formatted_ticker):
+    return f"fundamentals:{formatted_ticker}"
+
+
+def _quote_key(formatted_ticker):
+    return f"quote:{formatted_ticker}"
+
+
+# Cache tiers worth persisting across restarts
+SNAPSHOT_PREFIXES = ('quote:', 'fundamentals:')
+# Snapshot entries further past expiry than this can no longer be restored
+SNAPSHOT_MAX_AGE = _stock_cache.stale_ttl
+
+
+def snapshot_stock_cache():
+    """
+    Copy the quote and fundamentals tiers out of this worker's cache
+    
+    Returns:
+        list: (key, value, stored_at, expires_at) tuples, fresh or expired
+    """
+    return [entry for entry in _stock_cache.snapshot() if entry[0].startswith(SNAPSHOT_PREFIXES)]
+
+
+def restore_stock_cache(entries):
+    """
+    Warm this worker's cache from a saved snapshot
+    
+    Entries keep their original timestamps: those still fresh are served
+    normally and expired ones act as last-known-good fallbacks.
+    
+    Args:
+        entries: (key, value, stored_at, expires_at) tuples from snapshot_stock_cache()
+        
+    Returns:
+        int: Number of entries restored
+    """
+    return _stock_cache.restore(entry for entry in entries if entry[0].startswith(SNAPSHOT_PREFIXES))
+
+
+def _cached_fundamentals(formatted_ticker):
+    """Fresh or revalidating fundamentals tier for a ticker, or None."""
+    return _get_revalidating(_fundamentals_key(formatted_ticker), f"info:{formatted_ticker}",
+                             _fetch_stock_info, formatted_ticker)
+
+
+def _cached_quote(formatted_ticker):
+    """Fresh or revalidating quote tier for a ticker, or None."""
+    return _get_revalidating(_quote_key(formatted_ticker), f"quote:{formatted_ticker}",
+                             _fetch_quote, formatted_ticker)
+
+
+def _store_stock_info(formatted_ticker, stock_data, degraded=False):
+    """
+    Split full stock info into its quote and fundamentals tiers and cache both.
+    
+    Degraded info (built from price history when the info lookup failed) has
+    placeholder fundamentals: they never replace cached fundamentals, even
+    expired ones, and are only kept for the short default cache expiry.
+    
+    Args:
+        formatted_ticker (str): Normalized stock ticker symbol
+        stock_data (dict): Full stock info as returned by get_stock_info
+        degraded (bool): Fundamentals are placeholders rather than upstream data
+        
+    Returns:
+        dict: The stock info as cached, with any kept fundamentals merged in
+    """
+    quote = {field: stock_data[field] for field in QUOTE_FIELDS if field in stock_data}
+    fundamentals = {field: value for field, value in stock_data.items() if field not in QUOTE_FIELDS}
+    _cache_set(_quote_key(formatted_ticker), quote, ttl=market_calendar.quote_ttl(_quote_ttl))
+    _cache_delete(_missing_key(formatted_ticker))
+    
+    if degraded:
+        key = _fundamentals_key(formatted_ticker)
+        cached_fundamentals = _stock_cache.get_stale(key)
+        if cached_fundamentals is None and _shared_cache is not None:
+            entry = _shared_cache.get(key)
+            cached_fundamentals = entry[0] if entry else None
+        if cached_fundamentals is not None:
+            return {**cached_fundamentals, **quote}
+        _cache_set(key, fundamentals, ttl=_cache_expiry)
+        return stock_data
+    
+    _cache_set(_fundamentals_key(formatted_ticker), fundamentals, ttl=_fundamentals_ttl)
+    if stock_data.get('name') and stock_data['name'] != formatted_ticker:
+        get_symbol_index().add(formatted_ticker, stock_data['name'])
+    return stock_data
+
+
+def _stale_stock_info(formatted_ticker):
+    """
+    Rebuild full stock info from cached tiers of any age, for use as a fallback.
+    
+    Args:
+        formatted_ticker (str): Normalized stock ticker symbol
+        
+    Returns:
+        dict: Merged stock info or None if no fundamentals are cached
+    """
+    fundamentals = _cache_get_stale(_fundamentals_key(formatted_ticker))
+    if fundamentals is None:
+        return None
+    return {**fundamentals, **(_cache_get_stale(_quote_key(formatted_ticker)) or {})}
+
+
+def _get_cached_stock_info(formatted_ticker):
+    """
+    Get full stock info from the cache without going upstream
+    
+    Args:
+        formatted_ticker (str): Normalized stock ticker symbol
+        
+    Returns:
+        dict: Cached stock info, or None if either tier needs a synchronous fetch
+    """
+    fundamentals = _cached_fundamentals(formatted_ticker)
+    if fundamentals is None:
+        return None
+    quote = _cached_quote(formatted_ticker)
+    if quote is None:
+        return None
+    return {**fundamentals, **quote}
+
+
+def _load_stock_info(formatted_ticker):
+    """
+    Get full stock info, fetching only the tiers that are missing or expired
+    
+    A missing fundamentals tier triggers a full info download (which also
+    refreshes the quote); otherwise only the cheap quote is fetched.
+    
+    Tickers the provider answered for with an empty or non-equity result are
+    recorded by _fetch_stock_info for TICKER_NEGATIVE_CACHE_TTL seconds,
+    during which every lookup returns None without an upstream call.
+    Failed, rate-limited or timed-out lookups are never recorded.
+    
+    Args:
+        formatted_ticker (str): Normalized stock ticker symbol
+        
+    Returns:
+        dict: Dictionary with stock information or None if not found
+    """
+    # Concurrent misses for the same ticker share a single upstream fetch
+    fundamentals = _cached_fundamentals(formatted_ticker)
+    if fundamentals is None:
+        if is_known_missing(formatted_ticker):
+            logger.info(f"Skipping lookup for {formatted_ticker}: recently not found")
+            return None
+        return _shared_fetch(f"info:{formatted_ticker}", lambda: _stale_stock_info(formatted_ticker),
+                             _fetch_stock_info, formatted_ticker)
+    
+    quote = _cached_quote(formatted_ticker)
+    if quote is None:
+        quote = _shared_fetch(f"quote:{formatted_ticker}", lambda: _stale_quote(formatted_ticker),
+                              _fetch_quote, formatted_ticker)
+    if quote is None:
+        # The quote endpoint failed with nothing cached; fall back to the full download
+        return _shared_fetch(f"info:{formatted_ticker}", lambda: _stale_stock_info(formatted_ticker),
+                             _fetch_stock_info, formatted_ticker, True)
+    return {**fundamentals, **quote}
+
+
+def _to_number(value):
+    """Convert an upstream numeric field to float, treating None/NaN/garbage as 0."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(value) else value
+
+
+def _fetch_quote(formatted_ticker, force=False):
+    """
+    Fetch the lightweight quote tier (price, previous close, volume) and cache it
+    
+    Args:
+        formatted_ticker (str): Normalized stock ticker symbol
+        force (bool): Fetch even if a fresh quote is already cached
+        
+    Returns:
+        dict: Quote fields, the last cached quote if the fetch fails, or None
+    """
+    entry = _stock_cache.peek(_quote_key(formatted_ticker))
+    if not force and entry is not None and entry[2] > time.time():
+        return entry[0]
+    
+    try:
+        quote = get_provider().get_quote(formatted_ticker) or {}
+        current_price = _to_number(quote.get('price'))
+        previous_close = _to_number(quote.get('previous_close'))
+        
+        if current_price > 0:
+            if previous_close <= 0:
+                previous_close = current_price  # Fallback to avoid division by zero
+            change = current_price - previous_close
+            quote_data = {
+                'current_price': current_price,
+                'previous_close': previous_close,
+                'change': change,
+                'change_percent': (change / previous_close * 100) if previous_close > 0 else 0.0,
+                'volume': int(_to_number(quote.get('volume'))),
+            }
+            _cache_set(_quote_key(formatted_ticker), quote_data, ttl=market_calendar.quote_ttl(_quote_ttl))
+            return quote_data
+        logger.warning(f"No valid quote price for {formatted_ticker}")
+    except UpstreamUnavailable as e:
+        logger.warning(f"Skipping quote fetch for {formatted_ticker}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error fetching quote for {formatted_ticker}: {str(e)}")
+    
+    cached_quote = _cache_get_stale(_quote_key(formatted_ticker))
+    if cached_quote is not None:
+        logger.info(f"Returning expired cached quote for {formatted_ticker} as fallback")
+    return cached_quote
+
+
+def _cache_set(key, value, ttl=None):
+    """
+    Store a value in this worker's cache and the shared cache.
+    
+    Args:
+        key (str): Cache key
+        value: Value to cache
+        ttl (float): Freshness lifetime in seconds (defaults to _cache_expiry)
+    """
+    ttl = _cache_expiry if ttl is None else ttl
+    _stock_cache.set(key, value, ttl=ttl)
+    if _shared_cache is not None:
+        _shared_cache.set(key, value, ttl)
+
+
+def _cache_delete(key):
+    """Remove a key from this worker's cache and the shared cache."""
+    _stock_cache.delete(key)
+    if _shared_cache is not None:
+        _shared_cache.delete(key)
+
+
+def _missing_key(formatted_ticker):
+    return f"missing:{formatted_ticker}"
+
+
+def is_known_missing(ticker):
+    """
+    Check whether the provider recently answered that a ticker has no usable data
+    
+    Args:
+        ticker (str): The stock ticker symbol
+        
+    Returns:
+        bool: True while the ticker is in the negative cache
+    """
+    return bool(_negative_ttl and _cache_get(_missing_key(ticker.upper().strip())))
+
+
+def _remember_missing(formatted_ticker):
+    """Record that the provider has no usable data for a ticker, so lookups skip it."""
+    if _negative_ttl:
+        _cache_set(_missing_key(formatted_ticker), True, ttl=_negative_ttl)
+
+
+def _in_request(fn):
+    """Wrap fn to run on the worker pool under the calling request's deadline and timer."""
+    return deadline.propagate(request_timing.propagate(fn))
+
+
+def _get_batch_executor():
+    """Return the shared thread pool used for bulk market data lookups."""
+    global _batch_executor
+    if _batch_executor is None:
+        _batch_executor = ThreadPoolExecutor(max_workers=_batch_workers, thread_name_prefix='market-data')
+    return _batch_executor
 
 def get_stock_info(ticker):
     """
-    Get basic info for a stock using yfinance
+    Get basic info for a stock from the market data provider
     
     Args:
         ticker (str): The stock ticker symbol
@@ -22,40 +555,100 @@ def get_stock_info(ticker):
     Returns:
         dict: Dictionary with stock information or None if not found
     """
-    # Check cache first
     formatted_ticker = ticker.upper().strip()
-    current_time = time.time()
+    return _load_stock_info(formatted_ticker)
+
+
+def get_stock_quote(ticker):
+    """
+    Get only the lightweight quote for a stock (price, previous close, change, volume)
     
-    if formatted_ticker in _stock_cache:
-        cache_data, timestamp = _stock_cache[formatted_ticker]
-        # Return cached data if it's still fresh
-        if current_time - timestamp < _cache_expiry:
-            logger.info(f"Using cached data for {formatted_ticker}")
-            return cache_data
+    Price-only callers use this so they never download the full fundamentals blob.
     
+    Args:
+        ticker (str): The stock ticker symbol
+        
+    Returns:
+        dict: Quote fields or None if no price is available
+    """
+    formatted_ticker = ticker.upper().strip()
+    quote = _cached_quote(formatted_ticker)
+    if quote is None:
+        quote = _shared_fetch(f"quote:{formatted_ticker}", lambda: _stale_quote(formatted_ticker),
+                              _fetch_quote, formatted_ticker)
+    return quote
+
+
+def get_stock_fundamentals(ticker):
+    """
+    Get only the slow-moving fundamentals for a stock (name, sector, ratios, description)
+    
+    Args:
+        ticker (str): The stock ticker symbol
+        
+    Returns:
+        dict: Fundamentals fields or None if not found
+    """
+    formatted_ticker = ticker.upper().strip()
+    fundamentals = _cached_fundamentals(formatted_ticker)
+    if fundamentals is not None:
+        return fundamentals
+    stock_info = _shared_fetch(f"info:{formatted_ticker}", lambda: _stale_stock_info(formatted_ticker),
+                               _fetch_stock_info, formatted_ticker)
+    if stock_info is None:
+        return None
+    return {field: value for field, value in stock_info.items() if field not in QUOTE_FIELDS}
+
+
+def _fetch_stock_info(formatted_ticker, force=False):
+    """
+    Fetch stock info from the market data provider and cache it
+    
+    Falls back to expired cached data when the upstream lookup fails.
+    
+    Args:
+        formatted_ticker (str): Normalized stock ticker symbol
+        force (bool): Fetch even if a fresh entry is already cached
+        
+    Returns:
+        dict: Dictionary with stock information or None if not found
+    """
+    # Another request may have filled the cache just before this fetch started
+    if not force:
+        now = time.time()
+        fundamentals_entry = _stock_cache.peek(_fundamentals_key(formatted_ticker))
+        quote_entry = _stock_cache.peek(_quote_key(formatted_ticker))
+        if fundamentals_entry and quote_entry and fundamentals_entry[2] > now and quote_entry[2] > now:
+            return {**fundamentals_entry[0], **quote_entry[0]}
+    
+    degraded = False
     try:
-        # Normalize ticker format
         logger.info(f"Attempting to fetch stock info for ticker: {formatted_ticker}")
         
-        # Get stock info from yfinance
-        stock = yf.Ticker(formatted_ticker)
+        # Get stock info from the configured market data provider
+        provider = get_provider()
         
         # Force data download to ensure latest info
         logger.info(f"Getting info for {formatted_ticker}")
         try:
-            info = stock.info
+            info = provider.get_info(formatted_ticker)
+        except UpstreamUnavailable as unavailable:
+            # Upstream is throttled or down: skip the fallback chain and serve cached data
+            logger.warning(f"Skipping info fetch for {formatted_ticker}: {str(unavailable)}")
+            return _stale_stock_info(formatted_ticker)
         except Exception as inner_e:
-            logger.error(f"Failed to get stock.info for {formatted_ticker}: {str(inner_e)}")
+            logger.error(f"Failed to get info for {formatted_ticker}: {str(inner_e)}")
             # Try to get a quote as an alternative
             try:
                 logger.info(f"Trying to get quote data for {formatted_ticker}")
-                quote = stock.history(period="1d")
+                quote = provider.get_history(formatted_ticker, period="1d")
                 if quote.empty:
                     logger.warning(f"Empty quote data for {formatted_ticker}")
                     # Check if we have cached data as a fallback
-                    if formatted_ticker in _stock_cache:
+                    cached_data = _stale_stock_info(formatted_ticker)
+                    if cached_data is not None:
                         logger.info(f"Returning expired cached data for {formatted_ticker} as fallback")
-                        return _stock_cache[formatted_ticker][0]
+                        return cached_data
                     return None
                     
                 # Create minimal info from quote data
@@ -66,21 +659,26 @@ def get_stock_info(ticker):
                     'previousClose': quote['Close'].iloc[0] if len(quote) > 0 else 0,
                 }
                 logger.info(f"Created minimal info from quote for {formatted_ticker}")
+                degraded = True
             except Exception as quote_e:
                 logger.error(f"Failed to get quote for {formatted_ticker}: {str(quote_e)}")
                 # Check if we have cached data as a fallback
-                if formatted_ticker in _stock_cache:
+                cached_data = _stale_stock_info(formatted_ticker)
+                if cached_data is not None:
                     logger.info(f"Returning expired cached data for {formatted_ticker} as fallback")
-                    return _stock_cache[formatted_ticker][0]
+                    return cached_data
                 return None
         
         # Basic validation to ensure we have real data
         if not info:
             logger.warning(f"Empty info data for {formatted_ticker}")
             # Check if we have cached data as a fallback
-            if formatted_ticker in _stock_cache:
+            cached_data = _stale_stock_info(formatted_ticker)
+            if cached_data is not None:
                 logger.info(f"Returning expired cached data for {formatted_ticker} as fallback")
-                return _stock_cache[formatted_ticker][0]
+                return cached_data
+            # The provider answered and knows nothing about this ticker
+            _remember_missing(formatted_ticker)
             return None
             
         # Check if we have a valid equity
@@ -112,9 +710,11 @@ def get_stock_info(ticker):
                     info['longName'] = f"{formatted_ticker} Stock"
             else:
                 # Check if we have cached data as a fallback
-                if formatted_ticker in _stock_cache:
+                cached_data = _stale_stock_info(formatted_ticker)
+                if cached_data is not None:
                     logger.info(f"Returning expired cached data for {formatted_ticker} as fallback")
-                    return _stock_cache[formatted_ticker][0]
+                    return cached_data
+                _remember_missing(formatted_ticker)
                 return None
         
         # Calculate change and change percent
@@ -135,7 +735,7 @@ def get_stock_info(ticker):
             # If still zero, try getting latest quote
             if current_price == 0:
                 try:
-                    quote = stock.history(period="1d")
+                    quote = provider.get_history(formatted_ticker, period="1d")
                     if not quote.empty:
                         current_price = quote['Close'].iloc[-1]
                         logger.info(f"Using quote Close price: {current_price}")
@@ -143,9 +743,10 @@ def get_stock_info(ticker):
                     logger.error(f"Failed to get quote for price: {str(quote_e)}")
                     
                     # Check if we have cached data as a fallback
-                    if current_price == 0 and formatted_ticker in _stock_cache:
+                    cached_data = _stale_stock_info(formatted_ticker)
+                    if current_price == 0 and cached_data is not None:
                         logger.info(f"Using price from expired cached data for {formatted_ticker}")
-                        current_price = _stock_cache[formatted_ticker][0]['current_price']
+                        current_price = cached_data['current_price']
         
         # Ensure we have a positive previous close
         if previous_close <= 0 and current_price > 0:
@@ -165,6 +766,7 @@ def get_stock_info(ticker):
             'sector': info.get('sector', 'Unknown'),
             'industry': info.get('industry', 'Unknown'),
             'current_price': current_price or 0.0,
+            'previous_close': previous_close or 0.0,
             'market_cap': info.get('marketCap', 0) or 0.0,
             'pe_ratio': info.get('trailingPE', info.get('forwardPE', 0)) or 0.0,
             'dividend_yield': (info.get('dividendYield', 0) * 100 if info.get('dividendYield') else 0) or 0.0,
@@ -180,65 +782,261 @@ def get_stock_info(ticker):
         }
         
         # Store in cache
-        _stock_cache[formatted_ticker] = (stock_data, current_time)
+        stock_data = _store_stock_info(formatted_ticker, stock_data, degraded=degraded)
         
         logger.info(f"Successfully fetched stock info for {formatted_ticker}")
         return stock_data
     except Exception as e:
-        logger.error(f"Error fetching stock info for {ticker}: {str(e)}")
+        logger.error(f"Error fetching stock info for {formatted_ticker}: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
         
         # Check if we have cached data as a fallback
-        if formatted_ticker in _stock_cache:
+        cached_data = _stale_stock_info(formatted_ticker)
+        if cached_data is not None:
             logger.info(f"Returning expired cached data for {formatted_ticker} after error")
-            return _stock_cache[formatted_ticker][0]
+            return cached_data
         return None
 
 
-def get_stock_historical_data(ticker, period='1mo'):
+def get_stock_infos(tickers):
     """
-    Get historical price data for a stock using yfinance
+    Get basic info for many stocks at once
+    
+    Tickers with fresh (or revalidating) cached data are answered from the cache;
+    the rest are fetched concurrently on a bounded worker pool, filling the cache
+    in one pass.
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        
+    Returns:
+        dict: Mapping of normalized ticker to stock info dict (None if not found),
+              in the order the tickers were given
+    """
+    formatted_tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t))
+    results = {}
+    missing = []
+    
+    for formatted_ticker in formatted_tickers:
+        cache_data = _get_cached_stock_info(formatted_ticker)
+        if cache_data is not None:
+            results[formatted_ticker] = cache_data
+        else:
+            missing.append(formatted_ticker)
+    
+    if len(missing) == 1:
+        results[missing[0]] = _load_stock_info(missing[0])
+    elif missing:
+        logger.info(f"Fetching stock info for {len(missing)} tickers: {', '.join(missing)}")
+        for formatted_ticker, stock_info in zip(missing, _get_batch_executor().map(_in_request(_load_stock_info), missing)):
+            results[formatted_ticker] = stock_info
+    
+    return {formatted_ticker: results.get(formatted_ticker) for formatted_ticker in formatted_tickers}
+
+
+def get_stock_quotes(tickers):
+    """
+    Get the lightweight quote for many stocks at once
+
+    Cached quotes are answered directly; the rest are fetched concurrently on
+    the shared worker pool. Used by the batch price endpoint so a page can
+    refresh every price it shows with one request.
+
+    Args:
+        tickers (list): Stock ticker symbols
+
+    Returns:
+        dict: Mapping of normalized ticker to quote dict (None if no price is
+              available), in the order the tickers were given
+    """
+    formatted_tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t))
+    results = {}
+    missing = []
+
+    for formatted_ticker in formatted_tickers:
+        quote = _cached_quote(formatted_ticker)
+        if quote is not None:
+            results[formatted_ticker] = quote
+        else:
+            missing.append(formatted_ticker)
+
+    if len(missing) == 1:
+        results[missing[0]] = get_stock_quote(missing[0])
+    elif missing:
+        logger.info(f"Fetching quotes for {len(missing)} tickers: {', '.join(missing)}")
+        for formatted_ticker, quote in zip(missing, _get_batch_executor().map(_in_request(get_stock_quote), missing)):
+            results[formatted_ticker] = quote
+
+    return {formatted_ticker: results.get(formatted_ticker) for formatted_ticker in formatted_tickers}
+
+
+def refresh_stock_infos(tickers, min_remaining=0, executor=None):
+    """
+    Re-fetch the cache tiers of tickers that are missing or about to expire
+    
+    Used by the background refresher to keep frequently viewed tickers warm.
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        min_remaining (float): Refresh entries with less than this many seconds of freshness left
+        executor: Thread pool to fetch on (defaults to the shared market data pool)
+        
+    Returns:
+        int: Number of tickers that were fetched
+    """
+    now = time.time()
+    due = []
+    
+    def is_due(key):
+        entry = _stock_cache.peek(key)
+        if entry is None and _shared_cache is not None:
+            entry = _shared_cache.get(key)
+        return entry is None or entry[2] - now < min_remaining
+    
+    for formatted_ticker in dict.fromkeys(t.upper().strip() for t in tickers if t):
+        if is_due(_fundamentals_key(formatted_ticker)):
+            due.append((formatted_ticker, True))
+        elif is_due(_quote_key(formatted_ticker)):
+            due.append((formatted_ticker, False))
+    
+    def fetch(item):
+        # Fundamentals refreshes download the full info (and quote); otherwise only the quote
+        formatted_ticker, full = item
+        if full:
+            return _inflight.do(f"info:{formatted_ticker}", _fetch_stock_info, formatted_ticker, True)
+        return _inflight.do(f"quote:{formatted_ticker}", _fetch_quote, formatted_ticker, True)
+    
+    if due:
+        list((executor or _get_batch_executor()).map(fetch, due))
+    return len(due)
+
+
+def _load_history_frame(formatted_ticker, period):
+    """
+    Get daily bars from the persistent history store, or straight from the provider
+    
+    The store needs an app context for database access; outside one (or if the
+    store fails) the full period is downloaded directly.
+    
+    Args:
+        formatted_ticker (str): Normalized stock ticker symbol
+        period (str): Time period for historical data
+        
+    Returns:
+        pandas.DataFrame: Daily bars for the period
+    """
+    if _history_store_enabled and has_app_context():
+        try:
+            return history_store.load_history(formatted_ticker, period)
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            logger.error(f"History store failed for {formatted_ticker} ({period}), fetching directly: {str(e)}")
+    return get_provider().get_history(formatted_ticker, period=period)
+
+
+def _get_history_frame(formatted_ticker, period):
+    """
+    Get daily bars for a period, slicing them from a cached longer period when possible
+    
+    The longest frame loaded for each ticker is kept for HISTORY_CACHE_TTL
+    seconds, so switching the chart from 1y to 6mo, 3mo or ytd needs no
+    further loading.
+    
+    Args:
+        formatted_ticker (str): Normalized stock ticker symbol
+        period (str): Time period for historical data
+        
+    Returns:
+        pandas.DataFrame: Daily bars for the period
+    """
+    today = datetime.now(MARKET_TZ).date()
+    required_start = history_store.period_start(period, today)
+    cache_key = f"history-frame:{formatted_ticker}"
+    
+    cached = _history_cache.get(cache_key)
+    if cached and (cached['start'] is None or (required_start is not None and cached['start'] <= required_start)):
+        return _slice_period(cached['frame'], period)
+    
+    hist = _inflight.do(f"history:{formatted_ticker}:{period}",
+                        _load_history_frame, formatted_ticker, period)
+    if not hist.empty:
+        # Keep whichever frame reaches further back
+        cached = _history_cache.get(cache_key)
+        if not cached or (cached['start'] is not None and (required_start is None or required_start < cached['start'])):
+            _history_cache.set(cache_key, {'start': required_start, 'frame': hist}, ttl=_history_cache_ttl)
+    return hist
+
+
+def _history_columns(hist):
+    """
+    Convert a history frame into plain Python lists, one per field
+    
+    Works on whole columns at once instead of building a Series per row.
+    
+    Args:
+        hist (pandas.DataFrame): Daily bars indexed by date
+        
+    Returns:
+        dict: Lists keyed by date, open, high, low, close and volume
+    """
+    return {
+        'date': hist.index.strftime('%Y-%m-%d').tolist(),
+        'open': hist['Open'].tolist(),
+        'high': hist['High'].tolist(),
+        'low': hist['Low'].tolist(),
+        'close': hist['Close'].tolist(),
+        'volume': hist['Volume'].tolist(),
+    }
+
+
+def get_stock_historical_data(ticker, period='1mo', columnar=False, points=None):
+    """
+    Get historical price data for a stock from the market data provider
     
     Args:
         ticker (str): The stock ticker symbol
         period (str): Time period for historical data (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
+        columnar (bool): Return one list per field instead of one dict per bar
+        points (int): Downsample to at most this many bars (LTTB on closing prices)
         
     Returns:
-        list: List of dictionaries with date and price data
+        list: List of dictionaries with date and price data, or a dict of
+            equal-length lists when columnar is set (empty on failure)
     """
     try:
         formatted_ticker = ticker.upper().strip()
-        stock = yf.Ticker(formatted_ticker)
-        hist = stock.history(period=period)
+        hist = _get_history_frame(formatted_ticker, period)
         
         if hist.empty:
             logger.warning(f"Empty historical data for {formatted_ticker} (period={period})")
-            return []
-            
-        # Convert dataframe to list of dicts for easier handling in Flask
-        data = []
-        for date, row in hist.iterrows():
-            data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'open': row['Open'],
-                'high': row['High'],
-                'low': row['Low'],
-                'close': row['Close'],
-                'volume': row['Volume']
-            })
+            return {} if columnar else []
+        
+        if points and len(hist) > points:
+            hist = hist.iloc[lttb_indices(hist['Close'].to_numpy(), points)]
             
-        return data
+        # Convert dataframe to plain lists for easier handling in Flask
+        columns = _history_columns(hist)
+        if columnar:
+            return columns
+        
+        fields = list(columns)
+        return [dict(zip(fields, values)) for values in zip(*columns.values())]
+    except UpstreamUnavailable as e:
+        logger.warning(f"Skipping historical data for {ticker} ({period}): {str(e)}")
+        return {} if columnar else []
     except Exception as e:
         logger.error(f"Error fetching historical data for {ticker}: {str(e)}")
         # If there's an error, try an alternative period as a fallback
         if period != '1mo':
             try:
                 logger.info(f"Trying fallback period (1mo) for {ticker}")
-                return get_stock_historical_data(ticker, '1mo')
+                _fallbacks.inc(path='history_1mo')
+                return get_stock_historical_data(ticker, '1mo', columnar=columnar, points=points)
             except Exception as fallback_e:
                 logger.error(f"Fallback also failed for {ticker}: {str(fallback_e)}")
-        return []
+        return {} if columnar else []
 
 
 def search_stocks(query):
@@ -256,8 +1054,8 @@ def search_stocks(query):
         formatted_ticker = query.upper().strip()
         logger.info(f"Looking up ticker: '{formatted_ticker}'")
         
-        # Try a direct lookup first
-        stock_info = get_stock_info(formatted_ticker)
+        # Try a direct lookup first (unknown tickers and their variants are negatively cached)
+        stock_info = _load_stock_info(formatted_ticker)
         
         # Add ticker suffix for NASDAQ stocks if not found
         if not stock_info and "." not in formatted_ticker:
@@ -276,7 +1074,7 @@ def search_stocks(query):
             # Try each alternative
             for alt_ticker in alternative_tickers:
                 logger.info(f"Trying alternative ticker format: {alt_ticker}")
-                stock_info = get_stock_info(alt_ticker)
+                stock_info = _load_stock_info(alt_ticker)
                 if stock_info:
                     stock_info['ticker'] = formatted_ticker  # Use original ticker for display
                     break
@@ -286,7 +1084,7 @@ def search_stocks(query):
             # Try with a dot instead of dash for some exchanges
             alt_ticker = formatted_ticker.replace("-", ".")
             logger.info(f"Trying dash replacement: {alt_ticker}")
-            stock_info = get_stock_info(alt_ticker)
+            stock_info = _load_stock_info(alt_ticker)
             if stock_info:
                 stock_info['ticker'] = formatted_ticker  # Use original ticker for display
         
@@ -306,7 +1104,7 @@ def search_stocks(query):
 
 def get_current_price(ticker):
     """
-    Get just the current price for a stock using yfinance
+    Get just the current price for a stock from the market data provider
     
     Args:
         ticker (str): The stock ticker symbol
@@ -317,80 +1115,92 @@ def get_current_price(ticker):
     try:
         formatted_ticker = ticker.upper().strip()
         
-        # Check if we have cached data first
-        if formatted_ticker in _stock_cache:
-            cache_data, timestamp = _stock_cache[formatted_ticker]
-            current_time = time.time()
-            
-            # Use cached price if it's still fresh (less than 5 minutes old)
-            if current_time - timestamp < _cache_expiry:
-                logger.info(f"Using cached price for {formatted_ticker}: ${cache_data['current_price']}")
-                return cache_data['current_price']
+        # The lightweight quote tier is enough for a price
+        quote = get_stock_quote(formatted_ticker)
+        if quote and quote.get('current_price', 0) > 0:
+            return quote['current_price']
         
-        # If no fresh cache, try to get fresh data
         stock_info = get_stock_info(formatted_ticker)
         if stock_info and stock_info.get('current_price', 0) > 0:
             return stock_info['current_price']
         
         # Fall back to direct API call if get_stock_info doesn't work
-        stock = yf.Ticker(formatted_ticker)
-        price = stock.info.get('currentPrice', stock.info.get('regularMarketPrice', 0))
+        provider = get_provider()
+        try:
+            info = provider.get_info(formatted_ticker)
+        except UpstreamUnavailable:
+            info = {}
+        price = info.get('currentPrice', info.get('regularMarketPrice', 0))
         
         # If price is 0, try get quote data
         if price == 0:
             try:
-                quote = stock.history(period="1d")
+                quote = provider.get_history(formatted_ticker, period="1d")
                 if not quote.empty:
                     price = quote['Close'].iloc[-1]
             except Exception as quote_e:
                 logger.error(f"Failed to get quote for price in get_current_price: {str(quote_e)}")
         
         # Finally, check for old cached data if we still have 0
-        if price == 0 and formatted_ticker in _stock_cache:
-            logger.info(f"Using expired cached price for {formatted_ticker}")
-            price = _stock_cache[formatted_ticker][0]['current_price']
+        if price == 0:
+            cached_data = _stale_stock_info(formatted_ticker)
+            if cached_data is not None:
+                logger.info(f"Using expired cached price for {formatted_ticker}")
+                price = cached_data['current_price']
             
         return price
     except Exception as e:
         logger.error(f"Error getting current price for {ticker}: {str(e)}")
         
         # If there's an error, try to use cached data
-        if formatted_ticker in _stock_cache:
+        cached_data = _stale_stock_info(formatted_ticker)
+        if cached_data is not None:
             logger.info(f"Using expired cached price after error for {formatted_ticker}")
-            return _stock_cache[formatted_ticker][0]['current_price']
+            return cached_data['current_price']
             
         return 0
 
 
 def get_market_summary():
     """
-    Get summary of major market indices using yfinance
+    Get summary of major market indices from their tracking ETFs
+    
+    Returns:
+        list: List with market index data
+    """
+    # Concurrent dashboard/home renders share one summary build
+    return _shared_fetch("market-summary", list, _build_market_summary)
+
+
+def _build_market_summary():
+    """
+    Build the market summary list from the index ETF quotes
+    
+    Changes are measured against the daily previous-close store when it has
+    the index, otherwise against the quote's own previous close.
     
     Returns:
         list: List with market index data
     """
     try:
-        # Use ETFs tracking these indices instead of direct index symbols
-        # DIA for Dow Jones, SPY for S&P 500, QQQ for NASDAQ, IWM for Russell 2000
-        indices = ["DIA", "SPY", "QQQ", "IWM"]
-        names = ["Dow Jones (DIA)", "S&P 500 (SPY)", "NASDAQ (QQQ)", "Russell 2000 (IWM)"]
-        
         result = []
         
-        for i, index in enumerate(indices):
-            ticker = yf.Ticker(index)
-            hist = ticker.history(period="2d")
+        index_tickers = [index for index, _ in MARKET_INDICES]
+        index_infos = get_stock_infos(index_tickers)
+        previous_closes = get_previous_closes(index_tickers) if has_app_context() else {}
+        for index, name in MARKET_INDICES:
+            stock_info = index_infos.get(index)
             
-            if not hist.empty and len(hist) >= 2:
-                prev_close = hist['Close'].iloc[-2]
-                current = hist['Close'].iloc[-1]
-                change = current - prev_close
-                change_percent = (change / prev_close) * 100
-                
+            if stock_info and stock_info.get('current_price', 0) > 0:
+                change, change_percent = stock_info['change'], stock_info['change_percent']
+                previous_close = previous_closes.get(index)
+                if previous_close:
+                    change = stock_info['current_price'] - previous_close
+                    change_percent = change / previous_close * 100
                 result.append({
-                    'name': names[i],
+                    'name': name,
                     'symbol': index,
-                    'price': current,
+                    'price': stock_info['current_price'],
                     'change': change,
                     'change_percent': change_percent
                 })
@@ -408,14 +1218,14 @@ def get_trending_stocks():
     Returns:
         list: List of trending stock data in standard format
     """
-    # Define a set of consistently reliable trending stocks
-    trending_tickers = ["SPY", "QQQ", "AAPL", "TSLA", "NVDA", "AMD", "GOOG", "LLY", "COST", "META", "NFLX", "AMZN", "AVGO", "PLTR"]
+    trending_tickers = TRENDING_TICKERS
     
     logger.info("Fetching trending stocks data")
     result = []
     
+    trending_infos = get_stock_infos(trending_tickers)
     for ticker in trending_tickers:
-        stock_info = get_stock_info(ticker)
+        stock_info = trending_infos.get(ticker)
         if stock_info:
             result.append(stock_info)
             if len(result) >= 14:  # Limit to 14 stocks
@@ -424,6 +1234,7 @@ def get_trending_stocks():
     # If we couldn't get enough stocks from yfinance, provide backup data
     if len(result) < 5:
         logger.warning("Insufficient trending stocks data from API, using backup data")
+        _fallbacks.inc(path='trending_backup')
         
         # Backup data for essential trending stocks
         backup_data = [
@@ -574,14 +1385,18 @@ def get_popular_stocks():
     Returns:
         list: List of popular stock data in standard format
     """
-    # Define a set of consistently reliable popular stocks
-    popular_tickers = ["AMZN", "META", "JPM", "V", "JNJ", "PG", "KO"]
+    popular_tickers = POPULAR_TICKERS
     
     logger.info("Fetching popular stocks data")
     result = []
     
+    # Fetch the first five in one batch and only reach for the spares if some fail
+    popular_infos = get_stock_infos(popular_tickers[:5])
+    if sum(1 for info in popular_infos.values() if info) < 5:
+        popular_infos.update(get_stock_infos(popular_tickers[5:]))
+    
     for ticker in popular_tickers:
-        stock_info = get_stock_info(ticker)
+        stock_info = popular_infos.get(ticker)
         if stock_info:
             result.append(stock_info)
             if len(result) >= 5:  # Limit to 5 stocks
@@ -590,6 +1405,7 @@ def get_popular_stocks():
     # If we couldn't get enough stocks from yfinance, provide backup data
     if len(result) < 3:
         logger.warning("Insufficient popular stocks data from API, using backup data")
+        _fallbacks.inc(path='popular_backup')
         
         # Backup data for essential popular stocks
         backup_data = [
@@ -0,0 +1,183 @@
+"""
+Local ticker symbol index for the Yale Trading Simulation Platform.
+Answers search-as-you-type queries (ticker prefixes, company name words and
+close misspellings) from memory, without calling the market data provider.
+"""
+import csv
+import difflib
+import logging
+import os
+import re
+import threading
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# Listing bundled with the app: ticker,name per line
+DEFAULT_LISTING_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'symbols.csv')
+
+# Words too common in company names to be useful for matching
+STOP_WORDS = {'the', 'inc', 'and', 'co', 'plc'}
+
+WORD_PATTERN = re.compile(r"[a-z0-9&']+")
+
+
+def _name_words(name):
+    """Split a company name into lowercase words worth indexing."""
+    return [word for word in WORD_PATTERN.findall(name.lower()) if word not in STOP_WORDS]
+
+
+class SymbolIndex:
+    """
+    In-memory index of ticker symbols and company names.
+
+    Tickers and (name word, ticker) pairs are kept in sorted lists so prefix
+    queries are a binary search plus a short scan. The sorted lists are
+    rebuilt lazily on the first search after symbols are added. Only queries
+    with no prefix match at all fall back to (slower) fuzzy matching.
+    """
+
+    def __init__(self):
+        self._names = {}  # ticker -> company name
+        self._tickers = []
+        self._words = []  # sorted (word, ticker) pairs
+        self._distinct_words = []
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self, path):
+        """
+        Add every symbol from a CSV listing with ticker and name columns.
+
+        Args:
+            path (str): Path of the listing file
+
+        Returns:
+            int: Number of symbols read
+        """
+        count = 0
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('ticker') and row.get('name'):
+                    self.add(row['ticker'], row['name'])
+                    count += 1
+        return count
+
+    def add(self, ticker, name):
+        """
+        Add or update a symbol.
+
+        Args:
+            ticker (str): Ticker symbol
+            name (str): Company name
+        """
+        ticker = ticker.upper().strip()
+        name = (name or '').strip()
+        if not ticker or not name:
+            return
+        with self._lock:
+            if self._names.get(ticker) != name:
+                self._names[ticker] = name
+                self._dirty = True
+
+    def _rebuild(self):
+        """Rebuild the sorted lookup lists. Caller holds the lock."""
+        self._tickers = sorted(self._names)
+        self._words = sorted(
+            (word, ticker) for ticker, name in self._names.items() for word in set(_name_words(name))
+        )
+        self._distinct_words = sorted({word for word, _ in self._words})
+        self._dirty = False
+
+    def search(self, query, limit=10):
+        """
+        Find symbols matching a partial ticker or company name.
+
+        Results are ordered exact ticker first, then ticker prefixes, then
+        company name word prefixes; fuzzy matches are used when none of those hit.
+
+        Args:
+            query (str): What the user has typed so far
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Dictionaries with ticker and name keys
+        """
+        upper = query.upper().strip()
+        terms = _name_words(query)
+        if not upper:
+            return []
+
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            names = self._names
+            tickers = self._tickers
+            words = self._words
+            distinct_words = self._distinct_words
+
+        matches = []
+        seen = set()
+
+        def add_match(ticker):
+            if ticker not in seen:
+                seen.add(ticker)
+                matches.append(ticker)
+
+        if upper in names:
+            add_match(upper)
+
+        position = bisect_left(tickers, upper)
+        while position < len(tickers) and len(matches) < limit and tickers[position].startswith(upper):
+            add_match(tickers[position])
+            position += 1
+
+        if terms and len(matches) < limit:
+            # Match on the first word, then require the rest anywhere in the name
+            first, rest = terms[0], terms[1:]
+            position = bisect_left(words, (first,))
+            while position < len(words) and len(matches) < limit and words[position][0].startswith(first):
+                ticker = words[position][1]
+                if all(term in names[ticker].lower() for term in rest):
+                    add_match(ticker)
+                position += 1
+
+        if not matches:
+            for ticker in difflib.get_close_matches(upper, tickers, n=limit, cutoff=0.75):
+                add_match(ticker)
+        if not matches and terms:
+            for word in difflib.get_close_matches(terms[0], distinct_words, n=3, cutoff=0.8):
+                position = bisect_left(words, (word,))
+                while position < len(words) and words[position][0] == word:
+                    add_match(words[position][1])
+                    position += 1
+
+        return [{'ticker': ticker, 'name': names[ticker]} for ticker in matches[:limit]]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._names)
+
+
+# Index shared by the whole process
+_index = SymbolIndex()
+
+
+def get_symbol_index():
+    """Return the process-wide symbol index."""
+    return _index
+
+
+def init_symbol_index(app):
+    """
+    Load the symbol listing configured by SYMBOL_LISTING_PATH (or the bundled one).
+
+    Args:
+        app: Flask application instance
+    """
+    path = app.config.get('SYMBOL_LISTING_PATH') or DEFAULT_LISTING_PATH
+    try:
+        count = _index.load(path)
+        logger.info(f"Loaded {count} symbols into the search index from {path}")
+    except (OSError, csv.Error) as e:
+        logger.error(f"Could not load symbol listing {path}: {str(e)}")
@@ -1,10 +1,10 @@
 from app import db
 from app.models.stock import StockHolding, Transaction
 from app.models.social import TradingPost
-from app.utils.stock_utils import get_stock_info, get_current_price, get_stock_historical_data
+from app.utils.stock_utils import get_stock_fundamentals, get_current_price, get_stock_historical_data
+from app.utils.previous_close import get_previous_closes
 from sqlalchemy.exc import SQLAlchemyError
 import logging
-import yfinance as yf
 
 logger = logging.getLogger(__name__)
 
@@ -35,9 +35,9 @@ def execute_buy(user, ticker, quantity, price, make_public=False, trading_note="
         # Deduct from user balance
         user.balance -= total_cost
         
-        # Get stock info
+        # Get stock info (only the company details are needed, not a fresh quote)
         logger.info(f"Retrieving stock info for ticker: {ticker}")
-        stock_info = get_stock_info(ticker)
+        stock_info = get_stock_fundamentals(ticker)
         
         # If we couldn't get stock info but have a valid price, use basic info
         if not stock_info and price > 0:
@@ -214,23 +214,17 @@ def get_portfolio_summary(user):
         total_day_change = 0
         stocks = []
         
+        # Previous closes for day change come from the daily store (one bulk fetch per trading day)
+        previous_closes = get_previous_closes([holding.ticker for holding in holdings])
+        
         for holding in holdings:
             day_change = 0
             try:
                 # Update current price
                 current_price = get_current_price(holding.ticker)
-                previous_close = 0
-
-                # Fetch 2 days history to get previous close
-                try:
-                    stock_hist = yf.Ticker(holding.ticker).history(period="2d")
-                    if not stock_hist.empty and len(stock_hist) >= 2:
-                        previous_close = stock_hist['Close'].iloc[-2]
-                    elif not stock_hist.empty:
-                        # Fallback if only 1 day of data (e.g., new IPO)
-                        previous_close = stock_hist['Close'].iloc[-1] 
-                except Exception as hist_e:
-                    logger.warning(f"Could not get history for {holding.ticker} to calculate day change: {hist_e}")
+                previous_close = previous_closes.get(holding.ticker.upper(), 0)
+                if previous_close <= 0:
+                    logger.warning(f"No previous close for {holding.ticker} to calculate day change")
 
                 # Protect against API failures for current price
                 if current_price <= 0:
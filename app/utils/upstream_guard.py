@@ -0,0 +1,146 @@
+"""
+Upstream protection for market data calls in the Yale Trading Simulation Platform.
+Provides a token-bucket rate limiter and a circuit breaker so a throttled or
+failing data source is called less, and callers fall back to cached data fast.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling the upstream source when it is rate limited or its circuit is open."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `burst`; each call
+    takes one. Callers wait for a token for at most `max_wait` seconds.
+    """
+
+    def __init__(self, rate, burst):
+        """
+        Create a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum tokens held (largest instantaneous burst)
+        """
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        """Add tokens earned since the last update. Caller holds the lock."""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait=0):
+        """
+        Take a token, waiting up to max_wait seconds for one to become available.
+
+        Args:
+            max_wait: Longest time to wait in seconds
+
+        Returns:
+            bool: True if a token was taken, False if the wait would be too long
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = 0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return False
+            # Reserve the token now so concurrent callers queue behind it
+            self._tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream that keeps failing, and probe it for recovery.
+
+    After `failure_threshold` consecutive failures the circuit opens and every
+    call is rejected for `reset_timeout` seconds. The first call after that
+    runs as a half-open probe: success closes the circuit, failure re-opens it
+    for another timeout. Other calls are rejected while the probe runs.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, name='upstream'):
+        """
+        Create a closed circuit.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe is allowed
+            name: Label used in log messages
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_rejecting(self):
+        """Return True if a call made now would be rejected."""
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self._opened_at < self.reset_timeout
+            return self.state == self.HALF_OPEN
+
+    def before_call(self):
+        """
+        Register an upcoming call.
+
+        Raises:
+            UpstreamUnavailable: If the circuit is open or a probe is already running
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                logger.info(f"Circuit for {self.name} half-open, probing upstream")
+                return
+        raise UpstreamUnavailable(f"Circuit for {self.name} is open")
+
+    def record_success(self):
+        """Register a successful call, closing the circuit."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed, upstream recovered")
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def release(self):
+        """Register a call that ended without showing whether the upstream is healthy."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                # Let the next call probe instead of leaving the circuit half-open
+                self.state = self.OPEN
+                self._opened_at = time.monotonic() - self.reset_timeout
+
+    def record_failure(self):
+        """Register a failed call, opening the circuit if the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit for {self.name} opened after {self._failures} failures; "
+                                   f"serving cached data for {self.reset_timeout}s")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
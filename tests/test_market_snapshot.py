@@ -0,0 +1,35 @@
+"""
+Tests that workers saving to the same market snapshot file merge their
+entries instead of overwriting each other's.
+"""
+import time
+
+from app.utils import market_snapshot, stock_utils
+
+
+def _entry(key, price, stored_at):
+    return (key, {'price': price}, stored_at, stored_at + 60)
+
+
+def test_workers_merge_into_one_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / 'snapshot.json.gz')
+    now = time.time()
+
+    # First worker exits with AAPL and an older MSFT quote
+    monkeypatch.setattr(stock_utils, 'snapshot_stock_cache',
+                        lambda: [_entry('quote:AAPL', 1.0, now), _entry('quote:MSFT', 2.0, now - 30)])
+    assert market_snapshot.save_snapshot(path) == 2
+
+    # Second worker exits later with a newer MSFT quote and GOOG
+    monkeypatch.setattr(stock_utils, 'snapshot_stock_cache',
+                        lambda: [_entry('quote:MSFT', 3.0, now), _entry('quote:GOOG', 4.0, now)])
+    assert market_snapshot.save_snapshot(path) == 3
+
+    # An expired-past-retention entry from a third worker is dropped
+    old = now - stock_utils.SNAPSHOT_MAX_AGE - 120
+    monkeypatch.setattr(stock_utils, 'snapshot_stock_cache',
+                        lambda: [_entry('quote:IBM', 5.0, old), _entry('quote:MSFT', 1.5, now - 60)])
+    assert market_snapshot.save_snapshot(path) == 3
+
+    entries = {key: value for key, value, _, _ in market_snapshot._read_entries(path)}
+    assert entries == {'quote:AAPL': {'price': 1.0}, 'quote:MSFT': {'price': 3.0}, 'quote:GOOG': {'price': 4.0}}
@@ -0,0 +1,83 @@
+"""
+Tests that unknown tickers are negatively cached on every lookup path,
+including the search form and the stock detail page.
+"""
+import pytest
+
+from app.utils import market_data
+from app.utils.market_data import FixtureProvider
+
+UNKNOWN = 'ZZZZZZZ'
+
+
+class CountingProvider(FixtureProvider):
+    """Fixture provider that records which tickers reached the upstream."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def get_info(self, ticker):
+        self.calls.append(ticker)
+        return super().get_info(ticker)
+
+    def get_quote(self, ticker):
+        self.calls.append(ticker)
+        return super().get_quote(ticker)
+
+    def unknown_calls(self):
+        return [ticker for ticker in self.calls if ticker.startswith(UNKNOWN)]
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('negative_cache')
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('DATABASE_URL', f"sqlite:///{directory / 'app.db'}")
+        patch.setenv('MARKET_DATA_PROVIDER', 'fixture')
+        patch.setenv('MARKET_SHARED_CACHE_PATH', '')
+        patch.setenv('MARKET_SNAPSHOT_PATH', '')
+        from app import create_app
+        app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    return app
+
+
+@pytest.fixture
+def client(app):
+    from app import db
+    from app.models.user import User
+
+    with app.app_context():
+        user = User('negcache')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def provider():
+    previous = market_data.get_provider()
+    provider = CountingProvider()
+    market_data.set_provider(provider)
+    yield provider
+    market_data.set_provider(previous)
+
+
+def test_repeated_unknown_ticker_lookups_skip_the_upstream(client, provider):
+    response = client.get(f'/search?ticker={UNKNOWN}')
+    assert response.status_code == 200
+    first_calls = len(provider.unknown_calls())
+    assert first_calls > 0
+
+    for _ in range(3):
+        assert client.get(f'/search?ticker={UNKNOWN}').status_code == 200
+        assert client.get(f'/stock/{UNKNOWN}').status_code == 302
+
+    assert len(provider.unknown_calls()) == first_calls